@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class KnowledgedbConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'knowledgedb'
+
+    def ready(self):
+        from django.conf import settings
+
+        from . import lazyload, signals  # noqa: F401
+
+        # only development and tests pay for the patched query paths;
+        # guard() installs them on first use otherwise
+        if getattr(settings, "LAZYLOAD_GUARD", None):
+            lazyload.install()
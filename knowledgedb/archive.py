@@ -0,0 +1,131 @@
+"""
+Hot/archive split of the tournament history.
+
+Tournaments that ended before a cutoff are moved, with their squads, seeds
+and teams, from the hot ``default`` database into the ``archive`` database
+(``manage.py archive_tournaments --before 2024-01-01``). Players and nations
+are copied but stay in the hot database, since current squads reference
+them too. Pages read the archive only on ``?archive=1``, and only once
+the first run has created its tables.
+"""
+import os
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.http import Http404
+
+from .models import DataVersion, Nation, Player, Squad, SquadTeam, Team, Tournament
+
+ARCHIVE_DB = "archive"
+
+# archive_tournaments usually runs in another process, so a missing archive
+# is looked for again after this many seconds; an existing one stays
+ARCHIVE_CHECK_INTERVAL = 60
+
+_available = False
+_checked_at = None
+
+
+def _archive_tables_exist():
+    connection = connections[ARCHIVE_DB]
+    name = connection.settings_dict["NAME"]
+    if connection.vendor == "sqlite" and not connection.is_in_memory_db() and not os.path.exists(name):
+        # connecting would create an empty database file
+        return False
+    return Tournament._meta.db_table in connection.introspection.table_names()
+
+
+def archive_configured():
+    """Whether settings.DATABASES has an archive; archive_tournaments creates its tables."""
+    return ARCHIVE_DB in settings.DATABASES
+
+
+def archive_available():
+    """Whether the archive database is configured and has been created."""
+    global _available, _checked_at
+    if not archive_configured():
+        return False
+    now = time.monotonic()
+    if not _available and (_checked_at is None or now - _checked_at >= ARCHIVE_CHECK_INTERVAL):
+        _available = _archive_tables_exist()
+        _checked_at = now
+    return _available
+
+
+def reset():
+    """Forget the last availability check."""
+    global _available, _checked_at
+    _available, _checked_at = False, None
+
+
+def database_for(request):
+    """
+    ``archive`` for ``?archive=1`` requests, else the hot database. Asking
+    for an archive that does not exist (yet) is a 404.
+    """
+    if request.GET.get("archive") != "1":
+        return DEFAULT_DB_ALIAS
+    if not archive_available():
+        raise Http404("No archive")
+    return ARCHIVE_DB
+
+
+def _copy(model, objects, **kwargs):
+    # primary keys are kept, so re-running after a failure is harmless and
+    # archive URLs keep the ids the pages had before
+    return len(model.objects.using(ARCHIVE_DB).bulk_create(objects, batch_size=500, **kwargs))
+
+
+def _update_fields(model):
+    return [f.name for f in model._meta.concrete_fields if not f.primary_key]
+
+
+def archive_tournaments(before, dry_run=False):
+    """
+    Move tournaments that ended before ``before`` into the archive database.
+    Returns counts per model.
+    """
+    tournaments = list(Tournament.objects.filter(end_date__lt=before))
+    squads = list(Squad.objects.filter(tournament__in=tournaments))
+    squad_teams = list(SquadTeam.objects.filter(squad__in=squads))
+    team_ids = {st.team_id for st in squad_teams}
+    teams = list(Team.objects.filter(pk__in=team_ids))
+    player_ids = {t.playerA_id for t in teams} | {t.playerB_id for t in teams}
+    players = list(Player.objects.filter(pk__in=player_ids))
+    nations = list(Nation.objects.filter(pk__in={s.nation_id for s in squads}))
+    mates = Player.normal_teammate.through
+    links = list(mates.objects.filter(from_player__in=player_ids, to_player__in=player_ids))
+
+    counts = Counter(tournaments=len(tournaments), squads=len(squads), squad_teams=len(squad_teams))
+    if dry_run or not tournaments:
+        counts["teams"] = len(teams)
+        return counts
+
+    from .signals import bulk_changes
+
+    call_command("migrate", database=ARCHIVE_DB, verbosity=0)
+    reset()
+    # the hot delete commits only after the archive copy did
+    with transaction.atomic(using=DEFAULT_DB_ALIAS), bulk_changes() as changed:
+        with transaction.atomic(using=ARCHIVE_DB):
+            for model, objects in ((Nation, nations), (Player, players), (Team, teams)):
+                # reference data may have been edited since an earlier run
+                _copy(model, objects, update_conflicts=True, unique_fields=["id"],
+                      update_fields=_update_fields(model))
+            _copy(mates, links, ignore_conflicts=True)
+            _copy(Tournament, tournaments, ignore_conflicts=True)
+            _copy(Squad, squads, ignore_conflicts=True)
+            _copy(SquadTeam, squad_teams, ignore_conflicts=True)
+
+        SquadTeam.objects.filter(squad__in=squads).delete()
+        Squad.objects.filter(pk__in=[s.pk for s in squads]).delete()
+        Tournament.objects.filter(pk__in=[t.pk for t in tournaments]).delete()
+        # teams still seeded in a current squad stay hot as well
+        counts["teams"], _ = Team.objects.filter(pk__in=team_ids, squad_teams__isnull=True).delete()
+        # NATIONS: the archive's nation table grew (refdata.py)
+        changed.update([DataVersion.NATIONS, DataVersion.TOURNAMENTS, DataVersion.PLAYERS,
+                        *(DataVersion.nation_scope(n.pk) for n in nations)])
+    return counts
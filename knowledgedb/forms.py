@@ -1,24 +1,28 @@
 from django import forms
-from .models import Squad
+from .models import Squad, Tournament
+from .refdata import attach_reference_data, store
 
 class SquadMatchForm(forms.Form):
     squad1 = forms.ModelChoiceField(
         label="Squad A",
-        queryset=Squad.objects.select_related("tournament", "nation").order_by("tournament__start_date"),
+        queryset=Squad.objects.order_by("tournament__start_date"),
     )
     squad2 = forms.ModelChoiceField(
         label="Squad B",
-        queryset=Squad.objects.select_related("tournament", "nation").order_by("tournament__start_date"),
+        queryset=Squad.objects.order_by("tournament__start_date"),
     )
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+        refs = store()
+
         def fmt(s):
-            # shows “Coed — Germany”
-            return f"{s.tournament.get_division_display()} — {s.nation.name}"
+            # shows “Coed — Germany”; names from the reference store, not a join
+            return f"{refs.tournament(s.tournament_id).get_division_display()} — {refs.nation(s.nation_id).name}"
             # optional fancier version with tournament/date:
-            # return f"{s.tournament.get_division_display()} — {s.nation.name} ({s.tournament.name})"
+            # t = refs.tournament(s.tournament_id)
+            # return f"{t.get_division_display()} — {refs.nation(s.nation_id).name} ({t.name})"
 
         self.fields["squad1"].label_from_instance = fmt
         self.fields["squad2"].label_from_instance = fmt
@@ -28,9 +32,19 @@ class SquadMatchForm(forms.Form):
         s1 = cleaned.get("squad1")
         s2 = cleaned.get("squad2")
         if s1 and s2:
+            attach_reference_data([s1, s2])
             if s1 == s2:
                 self.add_error("squad2", "Pick two different squads.")
             # Optional: require same division
             if s1.tournament.division != s2.tournament.division:
                 self.add_error(None, "Both squads must be in the same division.")
-        return cleaned
\ No newline at end of file
+        return cleaned
+
+class RosterImportForm(forms.Form):
+    file = forms.FileField(help_text="CSV or JSONL (.jsonl), one team per row.")
+    tournament = forms.ModelChoiceField(
+        queryset=Tournament.objects.order_by("-start_date"),
+        required=False,
+        help_text="Used for rows without a tournament column.",
+    )
+    dry_run = forms.BooleanField(initial=True, required=False, label="Dry run (only show the changes)")
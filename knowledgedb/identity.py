@@ -0,0 +1,205 @@
+"""
+Duplicate player detection and merging.
+
+Comparing every player with every other one is O(n²). Instead each player
+is put into a few blocks keyed by normalized name features:
+
+- the Soundex code of one name plus the initial of the other, which
+  catches spelling variants ("Meier"/"Mayer", "Jose"/"José")
+- character trigrams of the full name, which catch typos and swapped or
+  missing letters
+
+Only players sharing a block (or enough trigrams) are scored. Blocks larger
+than ``MAX_BLOCK_SIZE`` carry no information (a common trigram) and are
+skipped, which keeps the work roughly linear in the number of players.
+"""
+import difflib
+import unicodedata
+from collections import Counter, defaultdict
+from itertools import combinations
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import DataVersion, Player, SquadTeam, Team
+from .signals import bulk_changes
+
+MAX_BLOCK_SIZE = 50
+# pairs sharing at least this many trigrams become candidates
+MIN_SHARED_TRIGRAMS = 4
+DEFAULT_THRESHOLD = 0.85
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"),
+    **dict.fromkeys("cgjkqsxz", "2"),
+    **dict.fromkeys("dt", "3"),
+    "l": "4",
+    **dict.fromkeys("mn", "5"),
+    "r": "6",
+}
+
+
+def normalize(name):
+    """Lowercase ASCII letters and single spaces: "  Müller-Lüdenscheidt" -> "muller ludenscheidt"."""
+    name = name.replace("ß", "ss")
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    name = "".join(c if c.isalpha() else " " for c in name.lower())
+    return " ".join(name.split())
+
+
+def soundex(name):
+    letters = [c for c in name if c.isalpha()]
+    if not letters:
+        return ""
+    code = letters[0].upper()
+    previous = _SOUNDEX_CODES.get(letters[0], "")
+    for c in letters[1:]:
+        digit = _SOUNDEX_CODES.get(c, "")
+        if digit and digit != previous:
+            code += digit
+        if c not in "hw":
+            previous = digit
+    return (code + "000")[:4]
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PlayerName:
+    __slots__ = ("pk", "first", "last", "full", "birthdate", "grams")
+
+    def __init__(self, pk, firstname, lastname, birthdate):
+        self.pk = pk
+        self.first = normalize(firstname)
+        self.last = normalize(lastname)
+        self.full = f"{self.first} {self.last}"
+        self.birthdate = birthdate
+        self.grams = trigrams(self.full)
+
+    def blocking_keys(self):
+        return {
+            ("sx", soundex(self.last), self.first[:1]),
+            ("sx", soundex(self.first), self.last[:1]),
+        }
+
+
+def _score(a, b):
+    if a.birthdate and b.birthdate and a.birthdate != b.birthdate:
+        return 0.0
+    ratio = max(
+        difflib.SequenceMatcher(None, a.full, b.full).ratio(),
+        # swapped first and last name
+        difflib.SequenceMatcher(None, a.full, f"{b.last} {b.first}").ratio(),
+    )
+    if a.birthdate and a.birthdate == b.birthdate:
+        ratio = min(1.0, ratio + 0.1)
+    return ratio
+
+
+def candidate_pairs(names):
+    """Unordered pk pairs worth scoring, found through the blocking index."""
+    blocks = defaultdict(list)
+    gram_blocks = defaultdict(list)
+    for name in names:
+        for key in name.blocking_keys():
+            blocks[key].append(name)
+        for gram in name.grams:
+            gram_blocks[gram].append(name)
+
+    pairs = set()
+    for members in blocks.values():
+        if 1 < len(members) <= MAX_BLOCK_SIZE:
+            pairs.update(combinations(sorted(m.pk for m in members), 2))
+    shared = Counter()
+    for members in gram_blocks.values():
+        if 1 < len(members) <= MAX_BLOCK_SIZE:
+            shared.update(combinations(sorted(m.pk for m in members), 2))
+    pairs.update(pair for pair, count in shared.items() if count >= MIN_SHARED_TRIGRAMS)
+    return pairs
+
+
+def find_duplicates(threshold=DEFAULT_THRESHOLD, queryset=None):
+    """``[(score, player_a_id, player_b_id)]``, best matches first."""
+    queryset = Player.objects.all() if queryset is None else queryset
+    names = {
+        pk: PlayerName(pk, first, last, birthdate)
+        for pk, first, last, birthdate in queryset.values_list("pk", "firstname", "lastname", "birthdate")
+    }
+    found = []
+    for a, b in candidate_pairs(names.values()):
+        score = _score(names[a], names[b])
+        if score >= threshold:
+            found.append((round(score, 3), a, b))
+    return sorted(found, key=lambda match: (-match[0], match[1], match[2]))
+
+
+# fields copied from the duplicate when the kept player has no value
+_FILL_FIELDS = ("birthdate", "playing_since", "hometeam", "speciality", "achievements")
+
+
+class MergeError(Exception):
+    pass
+
+
+@transaction.atomic
+def merge_players(keep, duplicate):
+    """
+    Move every reference from ``duplicate`` to ``keep`` and delete it.
+    Teams that would become a pair ``keep`` already plays in are folded into
+    the existing team. Returns counts of what was moved.
+    """
+    if keep.pk == duplicate.pk:
+        raise MergeError("Cannot merge a player into itself.")
+    if Team.objects.filter(
+        Q(playerA=keep, playerB=duplicate) | Q(playerA=duplicate, playerB=keep)
+    ).exists():
+        raise MergeError(f"{keep} and {duplicate} played together, they are not the same person.")
+
+    # every nation either player was seeded for shows their figures; the
+    # updates below send no signals, so these scopes are bumped at the end
+    nation_ids = set(
+        SquadTeam.objects
+        .filter(Q(team__playerA__in=[keep, duplicate]) | Q(team__playerB__in=[keep, duplicate]))
+        .values_list("squad__nation_id", flat=True)
+    )
+    with bulk_changes() as changed:
+        counts = Counter()
+        teams = Team.objects.filter(Q(playerA=duplicate) | Q(playerB=duplicate))
+        partners = {
+            team.pk: team.playerB_id if team.playerA_id == duplicate.pk else team.playerA_id
+            for team in teams
+        }
+        existing = {
+            (team.playerB_id if team.playerA_id == keep.pk else team.playerA_id): team.pk
+            for team in Team.objects.filter(
+                Q(playerA=keep, playerB__in=partners.values()) | Q(playerB=keep, playerA__in=partners.values())
+            )
+        }
+
+        # pairs keep already plays in: move the seeds over, drop the team
+        folded = {team_id: existing[partner] for team_id, partner in partners.items() if partner in existing}
+        for old, new in folded.items():
+            # a squad listing both teams keeps the one it already had
+            SquadTeam.objects.filter(team_id=old, squad__squad_teams__team_id=new).delete()
+            counts["squad_teams"] += SquadTeam.objects.filter(team_id=old).update(team_id=new)
+        counts["teams_folded"] = Team.objects.filter(pk__in=folded).delete()[0]
+
+        counts["teams"] += Team.objects.filter(playerA=duplicate).update(playerA=keep)
+        counts["teams"] += Team.objects.filter(playerB=duplicate).update(playerB=keep)
+
+        mates = list(duplicate.normal_teammate.exclude(pk=keep.pk))
+        keep.normal_teammate.add(*mates)
+        duplicate.normal_teammate.clear()
+        counts["normal_teammates"] = len(mates)
+
+        for field in _FILL_FIELDS:
+            if not getattr(keep, field) and getattr(duplicate, field):
+                setattr(keep, field, getattr(duplicate, field))
+        keep.eura_pro = keep.eura_pro or duplicate.eura_pro
+        duplicate.delete()
+        keep.save()
+        changed.update([DataVersion.PLAYERS, *(DataVersion.nation_scope(n) for n in nation_ids)])
+    return counts
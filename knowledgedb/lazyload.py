@@ -0,0 +1,154 @@
+"""
+Strict mode against lazy relation loading (the source of N+1 queries).
+
+While a guard is active, every query Django would issue behind an attribute
+access is reported:
+
+- a forward foreign key that was not ``select_related`` (``team.playerA``)
+- a reverse foreign key or many-to-many manager that was not
+  ``prefetch_related`` (``squad.squad_teams.all``, ``player.normal_teammate.all``),
+  including querysets derived from it (``.filter()``, ``.first()``,
+  ``.count()``, ``.exists()``)
+- a deferred field read after ``only()``/``defer()``
+
+Not covered: ``filter()`` and friends on a manager that *was* prefetched
+(they query again, ignoring the prefetch), and aggregates.
+
+``LAZYLOAD_GUARD = "log"`` logs each one with a stack trace on the
+``knowledgedb.lazyload`` logger, ``"raise"`` raises ``LazyLoadError``.
+LazyLoadGuardMiddleware applies the setting to every request; ``guard()``
+does the same for any block of code.
+
+The patches are installed on first use of ``guard()`` (and at start-up
+when ``LAZYLOAD_GUARD`` is set), so a production process without the
+setting runs Django's code unpatched.
+"""
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.apps import apps
+from django.db.models import QuerySet
+from django.db.models.fields import related_descriptors
+from django.db.models.query_utils import DeferredAttribute
+
+logger = logging.getLogger(__name__)
+
+_mode = ContextVar("lazyload_guard", default=None)
+_installed = False
+
+
+class LazyLoadError(Exception):
+    pass
+
+
+@contextmanager
+def guard(mode="raise"):
+    install()
+    token = _mode.set(mode)
+    try:
+        yield
+    finally:
+        _mode.reset(token)
+
+
+def _report(instance, name):
+    mode = _mode.get()
+    if mode is None:
+        return
+    # no repr(instance) here: __str__ may itself trigger a lazy load
+    message = f"Lazy load of {type(instance).__name__}.{name} (pk={instance.pk})"
+    if mode == "raise":
+        raise LazyLoadError(message)
+    logger.warning(message, stack_info=True, stacklevel=3)
+
+
+def _guard_manager_factory(factory, cache_name):
+    def create(*args, **kwargs):
+        manager_cls = factory(*args, **kwargs)
+
+        class GuardedManager(manager_cls):
+            def get_queryset(self):
+                queryset = super().get_queryset()
+                name = cache_name(self)
+                if name not in getattr(self.instance, "_prefetched_objects_cache", {}):
+                    # reported when evaluated; prefetch_related_objects() also
+                    # builds querysets here but fills their result cache itself
+                    queryset._lazyload_source = (self.instance, name)
+                return queryset
+
+        GuardedManager.__name__ = manager_cls.__name__
+        GuardedManager.__qualname__ = manager_cls.__qualname__
+        return GuardedManager
+
+    return create
+
+
+def _reset_manager_classes():
+    # descriptors cache the manager class they built before install()
+    # (many-to-many descriptors are a subclass)
+    for model in apps.get_models(include_auto_created=True):
+        for attr in vars(model).values():
+            if isinstance(attr, related_descriptors.ReverseManyToOneDescriptor):
+                attr.__dict__.pop("related_manager_cls", None)
+
+
+def install():
+    """Patch the relation descriptors once; a no-op while no guard is active."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    get_object = related_descriptors.ForwardManyToOneDescriptor.get_object
+
+    def guarded_get_object(self, instance):
+        _report(instance, self.field.name)
+        return get_object(self, instance)
+
+    related_descriptors.ForwardManyToOneDescriptor.get_object = guarded_get_object
+
+    # descriptors build their manager classes lazily through these module
+    # level factories, so patching them covers every relation
+    related_descriptors.create_reverse_many_to_one_manager = _guard_manager_factory(
+        related_descriptors.create_reverse_many_to_one_manager,
+        lambda manager: manager.field.remote_field.cache_name,
+    )
+    related_descriptors.create_forward_many_to_many_manager = _guard_manager_factory(
+        related_descriptors.create_forward_many_to_many_manager,
+        lambda manager: manager.prefetch_cache_name,
+    )
+    _reset_manager_classes()
+
+    clone = QuerySet._clone
+
+    def guarded_clone(self):
+        cloned = clone(self)
+        source = getattr(self, "_lazyload_source", None)
+        if source is not None:
+            cloned._lazyload_source = source
+        return cloned
+
+    QuerySet._clone = guarded_clone
+
+    def report_query(method):
+        def guarded(self, *args, **kwargs):
+            source = getattr(self, "_lazyload_source", None)
+            if source is not None and self._result_cache is None:
+                _report(*source)
+            return method(self, *args, **kwargs)
+        return guarded
+
+    # count() and exists() query without filling the result cache
+    QuerySet._fetch_all = report_query(QuerySet._fetch_all)
+    QuerySet.count = report_query(QuerySet.count)
+    QuerySet.exists = report_query(QuerySet.exists)
+
+    deferred_get = DeferredAttribute.__get__
+
+    def guarded_deferred_get(self, instance, cls=None):
+        if instance is not None and self.field.attname not in instance.__dict__:
+            _report(instance, self.field.attname)
+        return deferred_get(self, instance, cls)
+
+    DeferredAttribute.__get__ = guarded_deferred_get
@@ -0,0 +1,24 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from knowledgedb.archive import archive_configured, archive_tournaments
+
+
+class Command(BaseCommand):
+    help = "Move tournaments that ended before a date into the read-only archive database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--before", required=True, type=datetime.date.fromisoformat,
+                            help="Cutoff date (YYYY-MM-DD); tournaments ending earlier are archived.")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        if not archive_configured():
+            raise CommandError("No 'archive' database configured in settings.DATABASES.")
+        counts = archive_tournaments(options["before"], dry_run=options["dry_run"])
+        verb = "Would move" if options["dry_run"] else "Moved"
+        self.stdout.write(
+            f"{verb} {counts['tournaments']} tournaments, {counts['squads']} squads, "
+            f"{counts['squad_teams']} seeds and {counts['teams']} teams to the archive."
+        )
@@ -0,0 +1,203 @@
+"""
+Render every page of knowledgedb/urls.py, capture its SQL and run
+EXPLAIN QUERY PLAN on each statement.
+
+    python manage.py audit_queries             # throwaway seeded database
+    python manage.py audit_queries --existing  # the configured database
+
+Reports full table scans, temporary B-trees (sorts/distinct without an
+index) and duplicate or repeated statements, with suggested index
+definitions. SQLite only.
+"""
+import re
+from collections import Counter, defaultdict
+from contextlib import nullcontext
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+
+from knowledgedb.sampledata import sample_paths, seeded_test_database
+
+# statements sent at least this often with different parameters are
+# reported as a probable N+1
+REPEAT_THRESHOLD = 3
+
+_TABLE_RE = re.compile(r'(?:FROM|JOIN)\s+"(\w+)"(?:\s+([A-Z]\d+))?')
+_COLUMN_RE = re.compile(r'(?:"(\w+)"|\b([A-Z]\d+))\."(\w+)"')
+_SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(\S+)(?: AS (\S+))?(.*)$")
+_ORDER_BY_RE = re.compile(r"\bORDER BY (.+?)(?:\bLIMIT\b|$)", re.S)
+
+
+def _model_tables():
+    return {m._meta.db_table: m for m in apps.get_models(include_auto_created=True)}
+
+
+def _indexed_prefixes(model):
+    """Leading column tuples of every index the model already has."""
+    meta = model._meta
+    prefixes = [(meta.pk.column,)]
+    for field in meta.concrete_fields:
+        if field.db_index or field.unique:
+            prefixes.append((field.column,))
+    for index in meta.indexes:
+        if index.fields:
+            prefixes.append(tuple(meta.get_field(f.lstrip("-")).column for f in index.fields))
+    for constraint in meta.constraints:
+        if getattr(constraint, "fields", None):
+            prefixes.append(tuple(meta.get_field(f).column for f in constraint.fields))
+    for fields in meta.unique_together:
+        prefixes.append(tuple(meta.get_field(f).column for f in fields))
+    return prefixes
+
+
+def _suggest_index(model, columns):
+    """``models.Index`` source for ``columns``, or None if one already leads with them."""
+    columns = [c for c in dict.fromkeys(columns) if c != model._meta.pk.column]
+    if not columns:
+        return None
+    for prefix in _indexed_prefixes(model):
+        if tuple(columns[:len(prefix)]) == prefix or prefix[:len(columns)] == tuple(columns):
+            return None
+    names = {f.column: f.name for f in model._meta.concrete_fields}
+    fields = ", ".join(f'"{names.get(c, c)}"' for c in columns)
+    return f"{model._meta.label}: models.Index(fields=[{fields}])"
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN every query issued by the knowledgedb pages and flag missing indexes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--existing", action="store_true",
+            help="Audit the configured database instead of a seeded throwaway one.",
+        )
+        parser.add_argument("--nations", type=int, default=8)
+        parser.add_argument("--seasons", type=int, default=3)
+
+    def handle(self, *args, **options):
+        self.verbosity = options["verbosity"]
+        if connection.vendor != "sqlite":
+            raise CommandError("audit_queries relies on SQLite's EXPLAIN QUERY PLAN.")
+
+        if options["existing"]:
+            database = nullcontext()
+        else:
+            database = seeded_test_database(nations=options["nations"], seasons=options["seasons"])
+        with database:
+            self.tables = _model_tables()
+            suggestions = Counter()
+            for path in self.paths():
+                statements = self.capture(path)
+                for suggestion in self.report(path, statements):
+                    suggestions[suggestion] += 1
+
+        if suggestions:
+            self.stdout.write(self.style.MIGRATE_HEADING("\nSuggested indexes"))
+            for suggestion, count in suggestions.most_common():
+                self.stdout.write(f"  {suggestion}  (from {count} finding(s))")
+        else:
+            self.stdout.write(self.style.SUCCESS("\nNo missing indexes found."))
+
+    def paths(self):
+        for name, path in sample_paths():
+            if path is None:
+                self.stderr.write(f"skipped {name}: no sample arguments")
+            else:
+                yield path
+
+    def capture(self, path):
+        statements = []
+
+        def record(execute, sql, params, many, context):
+            statements.append((sql, params, many))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            response = Client().get(path)
+        if response.status_code != 200:
+            self.stderr.write(f"GET {path} returned {response.status_code}")
+        return statements
+
+    def explain(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def report(self, path, statements):
+        findings = []
+        suggestions = []
+        selects = [(s, p) for s, p, many in statements if not many and s.lstrip().upper().startswith("SELECT")]
+
+        for number, (sql, params) in enumerate(selects, start=1):
+            aliases = {}
+            for table, alias in _TABLE_RE.findall(sql):
+                aliases[alias or table] = table
+            for detail in self.explain(sql, params):
+                scan = _SCAN_RE.match(detail)
+                alias = scan and (scan.group(2) or scan.group(1))
+                table = scan and aliases.get(alias, scan.group(1))
+                if scan and "USING" not in scan.group(3) and table in self.tables:
+                    findings.append((number, f"full table scan of {table}", sql))
+                    suggestion = self.scan_suggestion(sql, alias, table)
+                    if suggestion:
+                        suggestions.append(suggestion)
+                elif detail.startswith("USE TEMP B-TREE"):
+                    findings.append((number, detail.lower().replace("use ", "", 1), sql))
+                    suggestion = self.order_suggestion(sql, aliases)
+                    if suggestion:
+                        suggestions.append(suggestion)
+
+        executions = Counter(sql for sql, _ in selects)
+        variants = Counter(sql for sql, _ in {(sql, tuple(params or ())) for sql, params in selects})
+        for sql, count in executions.items():
+            if variants[sql] >= REPEAT_THRESHOLD:
+                message = f"repeated query ({count}x with {variants[sql]} parameter sets, probable N+1)"
+            elif count > variants[sql]:
+                message = f"duplicate query ({count}x with {variants[sql]} parameter set(s))"
+            else:
+                continue
+            findings.append((None, message, sql))
+
+        style = self.style.WARNING if findings else self.style.SUCCESS
+        self.stdout.write(style(f"GET {path}  ({len(statements)} queries, {len(findings)} findings)"))
+        for number, message, sql in findings:
+            where = f"#{number} " if number else ""
+            self.stdout.write(f"  {where}{message}")
+            if self.verbosity > 1:
+                self.stdout.write(f"      {sql}")
+        return suggestions
+
+    def _columns(self, sql, alias):
+        columns = []
+        for table, table_alias, column in _COLUMN_RE.findall(sql):
+            if (table_alias or table) == alias:
+                columns.append(column)
+        return columns
+
+    def _conditions(self, sql):
+        # WHERE and JOIN ... ON parts: the columns a statement filters on
+        where = sql.split(" WHERE ", 1)[1] if " WHERE " in sql else ""
+        where = _ORDER_BY_RE.split(where)[0]
+        return where + " ".join(re.findall(r"\bON \((.+?)\)", sql))
+
+    def scan_suggestion(self, sql, alias, table):
+        return _suggest_index(self.tables[table], self._columns(self._conditions(sql), alias))
+
+    def order_suggestion(self, sql, aliases):
+        match = _ORDER_BY_RE.search(sql)
+        if not match:
+            return None
+        by_alias = defaultdict(list)
+        for table, alias, column in _COLUMN_RE.findall(match.group(1)):
+            by_alias[alias or table].append(column)
+        if len(by_alias) != 1:
+            # sorting across joined tables cannot be served by one index
+            return None
+        alias, columns = by_alias.popitem()
+        model = self.tables.get(aliases.get(alias, alias))
+        if model is None:
+            return None
+        # an index serving the sort has to lead with the filtered columns
+        return _suggest_index(model, self._columns(self._conditions(sql), alias) + columns)
@@ -0,0 +1,65 @@
+"""
+Bytes on the wire and CPU cost per request of HTMLCompressionMiddleware.
+
+    python manage.py bench_compression [--iterations 50]
+
+Pages are rendered once against a seeded throwaway database with the
+middleware switched off; minification and each encoding are then timed
+on that HTML with process CPU time.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils.text import compress_string
+
+from knowledgedb import middleware
+from knowledgedb.sampledata import sample_paths, seeded_test_database
+
+MIDDLEWARE = "knowledgedb.middleware.HTMLCompressionMiddleware"
+
+
+def _cpu_ms(func, iterations):
+    start = time.process_time()
+    for _ in range(iterations):
+        result = func()
+    return result, (time.process_time() - start) * 1000 / iterations
+
+
+class Command(BaseCommand):
+    help = "Benchmark HTML minification and gzip/Brotli compression per view."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        without = [m for m in settings.MIDDLEWARE if m != MIDDLEWARE]
+        with seeded_test_database(), override_settings(MIDDLEWARE=without):
+            pages = [(path, Client().get(path).content.decode()) for _, path in sample_paths() if path]
+
+        if middleware.brotli is None:
+            self.stderr.write("brotli is not installed; only gzip is measured.")
+        self.stdout.write(
+            f"{'view':<30}{'raw B':>9}{'min B':>9}{'gzip B':>9}{'br B':>9}"
+            f"{'min ms':>9}{'gzip ms':>9}{'br ms':>9}"
+        )
+        for path, html in pages:
+            minified, min_ms = _cpu_ms(lambda: middleware.minify_html(html).encode(), iterations)
+            gzipped, gzip_ms = _cpu_ms(
+                lambda: compress_string(minified, max_random_bytes=middleware.GZipMiddleware.max_random_bytes),
+                iterations,
+            )
+            br_bytes = br_ms = "-"
+            if middleware.brotli is not None:
+                compressed, br_ms = _cpu_ms(
+                    lambda: middleware.brotli.compress(minified, quality=middleware.BROTLI_QUALITY),
+                    iterations,
+                )
+                br_bytes, br_ms = len(compressed), f"{br_ms:.3f}"
+            self.stdout.write(
+                f"{path:<30}{len(html.encode()):>9}{len(minified):>9}{len(gzipped):>9}{br_bytes:>9}"
+                f"{min_ms:>9.3f}{gzip_ms:>9.3f}{br_ms:>9}"
+            )
@@ -0,0 +1,95 @@
+"""
+Template render time per view under three template setups:
+
+- ``plain``: loaders without caching and no fragment cache, as with DEBUG
+- ``loader``: cached loader only, which is what Django did implicitly in
+  production before (APP_DIRS with DEBUG off)
+- ``fragments``: cached loader and cached layout fragments, the current
+  production setup
+
+``speedup`` compares ``fragments`` with ``loader``, i.e. what the fragment
+cache adds on top of the previous production setup.
+
+    python manage.py bench_templates [--iterations 200]
+
+Each page is requested once against a seeded throwaway database to capture
+its template and (already evaluated) context; only the template rendering
+is timed afterwards, so database time is not part of the figures.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.template import Context, Engine
+from django.template.backends.django import get_installed_libraries
+from django.test import Client
+from django.test.utils import ContextList, override_settings
+
+from knowledgedb.sampledata import sample_paths, seeded_test_database
+
+UNCACHED_FRAGMENTS = {
+    **settings.CACHES,
+    "template_fragments": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+}
+CACHED_FRAGMENTS = {
+    **settings.CACHES,
+    "template_fragments": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "bench-template-fragments",
+        "TIMEOUT": None,
+    },
+}
+
+
+def _engine(cached):
+    loaders = settings.BASE_TEMPLATE_LOADERS
+    if cached:
+        loaders = [("django.template.loaders.cached.Loader", loaders)]
+    return Engine(loaders=loaders, libraries=get_installed_libraries())
+
+
+class Command(BaseCommand):
+    help = "Benchmark template rendering per view with and without template caching."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=200)
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        with seeded_test_database():
+            captured = (self.capture(path) for _, path in sample_paths() if path)
+            # JSON endpoints render no template
+            pages = [page for page in captured if page]
+
+        self.stdout.write(
+            f"{'view':<40}{'plain ms':>12}{'loader ms':>12}{'fragments ms':>14}{'speedup':>10}"
+        )
+        for path, template_name, context in pages:
+            with override_settings(CACHES=UNCACHED_FRAGMENTS):
+                plain = self.time(_engine(cached=False), template_name, context, iterations)
+                loader = self.time(_engine(cached=True), template_name, context, iterations)
+            with override_settings(CACHES=CACHED_FRAGMENTS):
+                caches["template_fragments"].clear()
+                fragments = self.time(_engine(cached=True), template_name, context, iterations)
+            self.stdout.write(
+                f"{path:<40}{plain:>12.3f}{loader:>12.3f}{fragments:>14.3f}{loader / fragments:>9.1f}x"
+            )
+
+    def capture(self, path):
+        response = Client().get(path)
+        if not response.templates:
+            return None
+        context = response.context
+        if isinstance(context, ContextList):
+            context = context[0]
+        return path, response.templates[0].name, context.flatten()
+
+    def time(self, engine, template_name, context, iterations):
+        # one untimed render: loads templates into the cached loader and
+        # fills the fragment cache, as the first request after a deploy would
+        engine.get_template(template_name).render(Context(context))
+        start = time.perf_counter()
+        for _ in range(iterations):
+            engine.get_template(template_name).render(Context(context))
+        return (time.perf_counter() - start) * 1000 / iterations
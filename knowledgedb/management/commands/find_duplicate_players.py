@@ -0,0 +1,44 @@
+"""
+List likely duplicate players, and merge confirmed ones.
+
+    python manage.py find_duplicate_players [--threshold 0.85]
+    python manage.py find_duplicate_players --merge KEEP_ID DUPLICATE_ID [--merge ...]
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from knowledgedb.identity import DEFAULT_THRESHOLD, MergeError, find_duplicates, merge_players
+from knowledgedb.models import Player
+
+
+class Command(BaseCommand):
+    help = "Find duplicate players through a blocking index over their names, or merge them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                            help="Minimum similarity (0-1) to report a pair.")
+        parser.add_argument("--merge", nargs=2, type=int, action="append", metavar=("KEEP_ID", "DUPLICATE_ID"),
+                            help="Repoint everything from DUPLICATE_ID to KEEP_ID and delete it.")
+
+    def handle(self, *args, **options):
+        if options["merge"]:
+            for keep_id, duplicate_id in options["merge"]:
+                players = Player.objects.in_bulk([keep_id, duplicate_id])
+                if len(players) != 2:
+                    raise CommandError(f"Unknown player id in {keep_id} {duplicate_id}.")
+                keep, duplicate = players[keep_id], players[duplicate_id]
+                try:
+                    counts = merge_players(keep, duplicate)
+                except MergeError as exc:
+                    raise CommandError(exc)
+                moved = ", ".join(f"{n} {what}" for what, n in counts.items() if n)
+                self.stdout.write(self.style.SUCCESS(f"Merged {duplicate} into {keep} ({moved or 'no references'})."))
+            return
+
+        matches = find_duplicates(threshold=options["threshold"])
+        players = Player.objects.in_bulk({pk for _, a, b in matches for pk in (a, b)})
+        for score, a, b in matches:
+            pa, pb = players[a], players[b]
+            self.stdout.write(
+                f"{score:.2f}  #{a} {pa} ({pa.birthdate or '-'})  ~  #{b} {pb} ({pb.birthdate or '-'})"
+            )
+        self.stdout.write(f"{len(matches)} candidate pair(s) of {Player.objects.count()} players.")
@@ -0,0 +1,41 @@
+"""
+Import squad lists from a CSV or JSONL roster file.
+
+    python manage.py import_roster rosters.csv --tournament 12 --dry-run
+
+See knowledgedb/roster_import.py for the file layout.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from knowledgedb.roster_import import RosterImporter, RosterImportError, format_for, iter_rows
+
+
+class Command(BaseCommand):
+    help = "Upsert players, teams, squads and seeds from a CSV/JSONL roster file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="Default: from the file extension.")
+        parser.add_argument("--tournament", type=int, help="Tournament id for rows without one.")
+        parser.add_argument("--dry-run", action="store_true", help="Report the changes without writing them.")
+
+    def handle(self, *args, **options):
+        fmt = options["format"] or format_for(options["path"])
+        importer = RosterImporter(tournament=options["tournament"], dry_run=options["dry_run"])
+        try:
+            with open(options["path"], newline="", encoding="utf-8-sig") as stream:
+                report = importer.run(iter_rows(stream, fmt))
+        except (OSError, RosterImportError) as exc:
+            raise CommandError(exc)
+
+        if options["verbosity"] > 1 or options["dry_run"]:
+            for change in report.changes:
+                self.stdout.write(change)
+        for line in report.summary():
+            self.stdout.write(line)
+        if report.errors:
+            for error in report.errors:
+                self.stderr.write(error)
+            raise CommandError(f"{len(report.errors)} invalid row(s), nothing was imported.")
+        if not options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS("Import complete."))
@@ -0,0 +1,86 @@
+"""
+Start-up cost of a fresh WSGI worker.
+
+    python manage.py startup_report [--limit 15] [--no-warmup]
+
+Loads ``mate.wsgi`` in a new interpreter under ``python -X importtime``
+and reports import time per top-level package, the warm-up steps and the
+time to first byte of a request to ``/``. Run it after a deploy and
+compare with the previous figures.
+"""
+import json
+import os
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+CHILD = """
+import json, os, time
+start = time.perf_counter()
+os.environ['MATE_WARMUP'] = '0'
+import mate.wsgi
+loaded = time.perf_counter()
+timings = []
+if {warmup}:
+    from knowledgedb.warmup import warm_up
+    timings = warm_up()
+warmed = time.perf_counter()
+from django.test import Client
+from knowledgedb.warmup import _host
+status = Client(HTTP_HOST=_host()).get('/').status_code
+done = time.perf_counter()
+print(json.dumps({{
+    'load_ms': (loaded - start) * 1000,
+    'warmup': timings,
+    'warmup_ms': (warmed - loaded) * 1000,
+    'first_request_ms': (done - warmed) * 1000,
+    'status': status,
+}}))
+"""
+
+
+def import_times(stderr):
+    """Self time in ms per top-level package from ``-X importtime`` output."""
+    per_package = Counter()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        per_package[name.strip().split(".")[0]] += int(self_us) / 1000
+    return per_package
+
+
+class Command(BaseCommand):
+    help = "Report import time per package and time to first byte of a fresh worker."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=15, help="Packages to list.")
+        parser.add_argument("--no-warmup", action="store_true", help="Measure a worker without warm-up.")
+
+    def handle(self, *args, **options):
+        child = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", CHILD.format(warmup=not options["no_warmup"])],
+            capture_output=True, text=True, cwd=settings.BASE_DIR,
+            env={**os.environ, "DJANGO_SETTINGS_MODULE": "mate.settings"},
+        )
+        if child.returncode:
+            raise CommandError(child.stderr.strip().splitlines()[-1] if child.stderr.strip() else "worker failed")
+        result = json.loads(child.stdout.strip().splitlines()[-1])
+
+        packages = import_times(child.stderr)
+        self.stdout.write(f"{'package':<30}{'import ms':>12}")
+        for name, ms in packages.most_common(options["limit"]):
+            self.stdout.write(f"{name:<30}{ms:>12.1f}")
+        self.stdout.write(f"{'all imports':<30}{sum(packages.values()):>12.1f}\n")
+
+        self.stdout.write(f"{'load mate.wsgi':<30}{result['load_ms']:>12.1f}")
+        for step, count, ms in result["warmup"]:
+            self.stdout.write(f"{'  warm-up: ' + step:<30}{ms:>12.1f}{'' if count is not None else '  failed'}")
+        self.stdout.write(f"{'warm-up':<30}{result['warmup_ms']:>12.1f}")
+        self.stdout.write(f"{'first request (/)':<30}{result['first_request_ms']:>12.1f}  HTTP {result['status']}")
+        self.stdout.write(
+            f"{'time to first byte':<30}{result['load_ms'] + result['warmup_ms'] + result['first_request_ms']:>12.1f}"
+        )
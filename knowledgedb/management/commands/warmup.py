@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from knowledgedb.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = "Run the worker warm-up steps and report how long each took."
+
+    def handle(self, *args, **options):
+        timings = warm_up()
+        for step, count, ms in timings:
+            result = "failed (see log)" if count is None else f"{count} items"
+            self.stdout.write(f"{step:<20}{ms:>10.1f} ms  {result}")
+        self.stdout.write(f"{'total':<20}{sum(ms for _, _, ms in timings):>10.1f} ms")
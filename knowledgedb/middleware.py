@@ -0,0 +1,138 @@
+import re
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+from .lazyload import guard
+
+
+class LazyLoadGuardMiddleware:
+    """
+    Applies ``settings.LAZYLOAD_GUARD`` ("log", "raise" or None) to each
+    request. Paths in ``LAZYLOAD_GUARD_IGNORE`` (the admin by default) are
+    left alone.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = getattr(settings, "LAZYLOAD_GUARD", None)
+        ignored = getattr(settings, "LAZYLOAD_GUARD_IGNORE", ("/admin/",))
+        if mode is None or request.path.startswith(tuple(ignored)):
+            return self.get_response(request)
+        with guard(mode):
+            return self.get_response(request)
+
+
+# --- HTML minification and compression -------------------------------------
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# whitespace and comments inside these are kept verbatim
+_VERBATIM_RE = re.compile(r"(<(pre|textarea|script|style)\b.*?</\2\s*>)", re.S | re.I)
+# conditional comments (<!--[if IE]>) are kept
+_COMMENT_RE = re.compile(r"<!--(?!\[if).*?-->", re.S)
+_WHITESPACE_RE = re.compile(r"\s+")
+# a whole tag, quoted attribute values included (they may contain ">")
+_TAG_RE = re.compile(r"""(<(?:"[^"]*"|'[^']*'|[^'">])*>)""")
+_ACCEPTS_BR_RE = re.compile(r"\bbr\b")
+_COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript")
+
+# Brotli quality for on-the-fly compression; 11 is meant for static assets
+# and costs far more CPU than it saves bytes here
+BROTLI_QUALITY = 5
+
+
+def _collapse(match):
+    return "\n" if "\n" in match.group() else " "
+
+
+def _minify_text(text):
+    # tags stay as they are: whitespace in attribute values is data
+    pieces = _TAG_RE.split(_COMMENT_RE.sub("", text))
+    for i in range(0, len(pieces), 2):
+        pieces[i] = _WHITESPACE_RE.sub(_collapse, pieces[i])
+    return "".join(pieces)
+
+
+def minify_html(html):
+    """
+    Drop comments and collapse whitespace runs between tags to a single
+    space or newline, which browsers render identically. Tags (and so
+    attribute values) and pre/textarea/script/style are left untouched.
+    """
+    parts = _VERBATIM_RE.split(html)
+    out = []
+    # split() yields text, block, tag name, text, block, tag name, ...
+    for i in range(0, len(parts), 3):
+        out.append(_minify_text(parts[i]))
+        if i + 1 < len(parts):
+            out.append(parts[i + 1])
+    return "".join(out)
+
+
+def _brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class HTMLCompressionMiddleware(GZipMiddleware):
+    """
+    Minifies rendered HTML and compresses dynamic text responses with Brotli
+    (if the ``brotli`` package is installed and the client accepts ``br``) or
+    gzip. Responses shorter than ``COMPRESSION_MIN_LENGTH`` bytes after
+    minification are sent as they are; streaming responses are compressed
+    chunk by chunk and never minified.
+
+    Pages that contain a CSRF token always get gzip: GZipMiddleware pads its
+    output with random bytes against BREACH, which Brotli cannot do.
+    """
+
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding"):
+            return response
+        content_type = response.get("Content-Type", "")
+        if not content_type.startswith(_COMPRESSIBLE_TYPES):
+            return response
+
+        if not response.streaming:
+            if content_type.startswith("text/html") and getattr(settings, "HTML_MINIFY", True):
+                charset = response.charset
+                response.content = minify_html(response.content.decode(charset)).encode(charset)
+                response.headers["Content-Length"] = str(len(response.content))
+            if len(response.content) < getattr(settings, "COMPRESSION_MIN_LENGTH", 200):
+                return response
+
+        accept = request.META.get("HTTP_ACCEPT_ENCODING", "")
+        # set by get_token(), i.e. {% csrf_token %}, even after
+        # CsrfViewMiddleware reset it to False
+        has_csrf_token = "CSRF_COOKIE_NEEDS_UPDATE" in request.META
+        is_async = response.streaming and response.is_async
+        if brotli is None or not _ACCEPTS_BR_RE.search(accept) or is_async or has_csrf_token:
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if response.streaming:
+            response.streaming_content = _brotli_sequence(response.streaming_content)
+            del response.headers["Content-Length"]
+        else:
+            compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(response.content))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+        return response
@@ -179,3 +179,39 @@ class SquadTeam(models.Model):
 
     def __str__(self):
         return f"{self.squad} • {self.team} (seed {self.seed})"
+
+
+class DataVersion(models.Model):
+    """
+    A counter per cache scope ("nations", "nation:<id>", ...), bumped on
+    every change to the data behind it; caches put the version in their key.
+    Bumped by knowledgedb/signals.py, and explicitly by bulk writers
+    (roster import, player merge, archiving) through ``bulk_changes()``.
+    """
+    NATIONS = "nations"
+    TOURNAMENTS = "tournaments"
+    # player and team data shown in every nation's figures
+    PLAYERS = "players"
+
+    scope = models.CharField(max_length=50, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.scope} v{self.version}"
+
+    @staticmethod
+    def nation_scope(nation_id):
+        """The squads and rosters of one nation."""
+        return f"nation:{nation_id}"
+
+    @classmethod
+    def bump(cls, *scopes):
+        for scope in set(scopes):
+            if not cls.objects.filter(scope=scope).update(version=F("version") + 1):
+                cls.objects.get_or_create(scope=scope, defaults={"version": 1})
+
+    @classmethod
+    def current(cls, *scopes):
+        """Versions of ``scopes`` in order, 0 for scopes never bumped."""
+        versions = dict(cls.objects.filter(scope__in=scopes).values_list("scope", "version"))
+        return tuple(versions.get(scope, 0) for scope in scopes)
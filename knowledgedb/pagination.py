@@ -0,0 +1,98 @@
+"""
+Keyset ("seek") pagination.
+
+Instead of OFFSET, a page is addressed by an opaque cursor holding the
+ordering values of the last row already shown. The next page is then a
+plain range condition on an index, so page 50 costs the same as page 1.
+The ordering must be unique (end it with the primary key) and its fields
+non-null.
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import Http404
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), cls=DjangoJSONEncoder, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _ordering_field(model, field):
+    parts = field.lstrip("-").split("__")
+    for part in parts[:-1]:
+        model = model._meta.get_field(part).related_model
+    return model._meta.get_field(parts[-1])
+
+
+def decode_cursor(cursor, model, ordering):
+    """
+    The ordering values in ``cursor``, converted to the types of
+    ``model``'s ordering fields. Anything else (a tampered or stale
+    cursor) is a 404.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, binascii.Error):
+        raise Http404("Invalid page cursor")
+    if not isinstance(values, list) or len(values) != len(ordering):
+        raise Http404("Invalid page cursor")
+    converted = []
+    for field, value in zip(ordering, values):
+        if value is None or isinstance(value, (list, dict)):
+            raise Http404("Invalid page cursor")
+        try:
+            converted.append(_ordering_field(model, field).to_python(value))
+        except (ValidationError, ValueError, TypeError):
+            raise Http404("Invalid page cursor")
+    return converted
+
+
+def _seek_condition(ordering, values):
+    # (a, b) > (x, y)  <=>  a >= x AND (a > x OR (a = x AND b > y)), per-field
+    # direction. The redundant leading "a >= x" is what lets the database
+    # seek into the index instead of scanning it from the start.
+    condition = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        step = Q(**{f"{name}__{lookup}": values[i]})
+        for prev, value in zip(ordering[:i], values[:i]):
+            step &= Q(**{prev.lstrip("-"): value})
+        condition |= step
+    first = ordering[0]
+    bound = "lte" if first.startswith("-") else "gte"
+    return Q(**{f"{first.lstrip('-')}__{bound}": values[0]}) & condition
+
+
+def _ordering_value(obj, field):
+    value = obj
+    for part in field.lstrip("-").split("__"):
+        value = getattr(value, part)
+    return value
+
+
+def keyset_paginate(queryset, ordering, cursor=None, per_page=25):
+    """
+    Return ``(rows, next_cursor)`` for the page following ``cursor``.
+    ``next_cursor`` is None on the last page.
+    """
+    ordering = list(ordering)
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        queryset = queryset.filter(
+            _seek_condition(ordering, decode_cursor(cursor, queryset.model, ordering))
+        )
+
+    # one extra row tells us whether there is a next page, without a COUNT(*)
+    rows = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(_ordering_value(rows[-1], f) for f in ordering)
+    return rows, next_cursor
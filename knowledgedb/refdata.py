@@ -0,0 +1,159 @@
+"""
+Per-process, read-only copy of the small reference tables.
+
+Nations, tournaments and division labels are needed on nearly every page
+but change a few times a season. Instead of joining them into every query,
+pages load plain rows and ``attach_reference_data()`` puts compact records
+from this store into the ``nation``/``tournament`` relation caches, so
+``squad.nation.flag_emoji`` and ``str(squad)`` work without a query.
+
+Each worker holds one store per database alias. It checks the "nations"
+and "tournaments" DataVersion counters at most every
+``REFDATA_CHECK_INTERVAL`` seconds (one small query) and reloads both
+tables only when a counter moved. A lookup of an unknown id checks the
+counters right away, since the row may have been created since, and is
+remembered as missing until the next reload.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.http import Http404
+
+from .models import DataVersion, Divisions, Nation, Tournament
+
+DIVISION_LABELS = {value: str(label) for value, label in Divisions.choices}
+
+
+class NationRecord:
+    __slots__ = ("pk", "name", "short", "flag_emoji")
+
+    def __init__(self, pk, name, short, flag_emoji):
+        self.pk = pk
+        self.name = name
+        self.short = short
+        self.flag_emoji = flag_emoji
+
+    @property
+    def id(self):
+        return self.pk
+
+    def __str__(self):
+        return f"{self.name} ({self.short})"
+
+
+class TournamentRecord:
+    __slots__ = ("pk", "name", "start_date", "end_date", "location", "division")
+
+    def __init__(self, pk, name, start_date, end_date, location, division):
+        self.pk = pk
+        self.name = name
+        self.start_date = start_date
+        self.end_date = end_date
+        self.location = location
+        self.division = division
+
+    @property
+    def id(self):
+        return self.pk
+
+    def get_division_display(self):
+        return DIVISION_LABELS.get(self.division, self.division)
+
+    def __str__(self):
+        return f"{self.name} ({self.get_division_display()})"
+
+
+class ReferenceStore:
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+        self.nations = {}
+        self.nations_by_short = {}
+        self.tournaments = {}
+        self.missing = set()  # (table, pk) looked up in vain since the last load
+        self.version = None
+        self.checked = None
+        self._lock = threading.Lock()
+
+    def refresh(self, check_now=False):
+        """Reload if the data changed; checks at most every REFDATA_CHECK_INTERVAL seconds unless ``check_now``."""
+        now = time.monotonic()
+        if not check_now and self.checked is not None and now - self.checked < settings.REFDATA_CHECK_INTERVAL:
+            return self
+        with self._lock:
+            # counters live with the hot data; archive_tournaments bumps them too
+            version = DataVersion.current(DataVersion.NATIONS, DataVersion.TOURNAMENTS)
+            if version != self.version:
+                self.load()
+                self.version = version
+            self.checked = now
+        return self
+
+    def load(self):
+        nations = {
+            pk: NationRecord(pk, *fields)
+            for pk, *fields in Nation.objects.using(self.using).values_list("pk", "name", "short", "flag_emoji")
+        }
+        tournaments = {
+            pk: TournamentRecord(pk, *fields)
+            for pk, *fields in Tournament.objects.using(self.using).values_list(
+                "pk", "name", "start_date", "end_date", "location", "division",
+            )
+        }
+        # readers see either the old or the new tables, never a mix
+        self.nations, self.tournaments = nations, tournaments
+        self.nations_by_short = {n.short: n for n in nations.values()}
+        self.missing = set()
+
+    def nation(self, pk):
+        return self._get("nations", pk)
+
+    def tournament(self, pk):
+        return self._get("tournaments", pk)
+
+    def _get(self, table, pk):
+        record = getattr(self, table).get(pk)
+        if record is None and (table, pk) not in self.missing:
+            # created since the last check? reloads only if a counter moved
+            record = getattr(self.refresh(check_now=True), table).get(pk)
+            if record is None:
+                self.missing.add((table, pk))
+        return record
+
+
+_stores = {}
+
+
+def reset():
+    """Drop all stores; the next ``store()`` call reloads."""
+    _stores.clear()
+
+
+def store(using=DEFAULT_DB_ALIAS):
+    """The refreshed store of this process for ``using``."""
+    if using not in _stores:
+        _stores.setdefault(using, ReferenceStore(using))
+    return _stores[using].refresh()
+
+
+def get_tournament_or_404(pk, using=DEFAULT_DB_ALIAS):
+    record = store(using).tournament(pk)
+    if record is None:
+        raise Http404("No Tournament matches the given query.")
+    return record
+
+
+def attach_reference_data(objects, using=DEFAULT_DB_ALIAS):
+    """
+    Fill the ``nation`` and ``tournament`` relations of ``objects`` (e.g.
+    squads) with records from the store. Returns ``objects``.
+    """
+    refs = store(using)
+    for obj in objects:
+        for name, lookup in (("nation", refs.nation), ("tournament", refs.tournament)):
+            if hasattr(obj, f"{name}_id"):
+                field = obj._meta.get_field(name)
+                if not field.is_cached(obj):
+                    field.set_cached_value(obj, lookup(getattr(obj, field.attname)))
+    return objects
@@ -0,0 +1,359 @@
+"""
+Batched roster import from federation squad lists (CSV or JSON lines).
+
+One row places one team at one seed of a nation's squad::
+
+    tournament,nation,seed,a_firstname,a_lastname,a_birthdate,a_eura_pro,...,b_hometeam
+    12,DEU,1,Anna,Muster,1994-03-02,yes,...,Roundnet Berlin
+
+Player columns are ``a_``/``b_`` + firstname, lastname, birthdate,
+eura_pro, playing_since, hometeam; only names are required. ``tournament``
+may be left out when a default tournament is given.
+
+Nations are resolved by ``short``, players by (firstname, lastname,
+birthdate), teams by their unordered player pair. Each batch of rows costs
+a fixed number of queries: one lookup per model, then ``bulk_create`` /
+``bulk_update``. The whole file is one transaction, so the deferred
+uniqueness constraints (seed per squad, nation per tournament) are only
+checked once all rows and removals are in. SQLite does not create
+deferrable constraints at all, so the importer itself rejects a seed or a
+team listed twice for the same squad anywhere in the file. A dry run
+performs the same work and rolls it back, so its report is exactly what
+would be written.
+"""
+import csv
+import datetime
+import json
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models.functions import Greatest, Least
+
+from .models import DataVersion, Nation, Player, Squad, SquadTeam, Team, Tournament
+from .signals import bulk_changes
+
+BATCH_SIZE = 1000
+
+PLAYER_FIELDS = ("eura_pro", "playing_since", "hometeam")
+_TRUE = {"1", "true", "yes", "y", "x", "*"}
+
+
+class RosterImportError(Exception):
+    pass
+
+
+def iter_rows(stream, fmt):
+    """
+    Yield one row per data line of a text stream, without reading it whole.
+    A file that cannot be read (wrong encoding, broken CSV, invalid JSON)
+    raises RosterImportError.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        try:
+            yield from reader
+        except UnicodeDecodeError:
+            # decoding runs ahead in blocks, so there is no useful line number
+            raise RosterImportError("The file is not UTF-8 encoded.")
+        except csv.Error as exc:
+            raise RosterImportError(f"line {reader.line_num}: {exc}")
+    elif fmt == "jsonl":
+        try:
+            for number, line in enumerate(stream, start=1):
+                if line.strip():
+                    yield json.loads(line)
+        except UnicodeDecodeError:
+            raise RosterImportError("The file is not UTF-8 encoded.")
+        except ValueError as exc:
+            raise RosterImportError(f"line {number}: {exc}")
+    else:
+        raise RosterImportError(f"Unknown format {fmt!r}, expected csv or jsonl")
+
+
+def format_for(filename):
+    return "jsonl" if filename.lower().endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def _text(row, key):
+    value = row.get(key)
+    return "" if value is None else str(value).strip()
+
+
+def _date(row, key):
+    value = _text(row, key)
+    return datetime.date.fromisoformat(value) if value else None
+
+
+def _bool(row, key):
+    value = row.get(key)
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in _TRUE
+
+
+class ImportReport:
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.rows = 0
+        self.counts = defaultdict(Counter)
+        self.changes = []
+        self.errors = []
+
+    def count(self, model, outcome, n=1):
+        self.counts[model.__name__][outcome] += n
+
+    def summary(self):
+        lines = [f"{self.rows} rows{' (dry run, nothing written)' if self.dry_run else ''}"]
+        for model in ("Player", "Team", "Squad", "SquadTeam"):
+            counts = self.counts.get(model)
+            if counts and any(counts.values()):
+                parts = ", ".join(f"{counts[k]} {k}" for k in ("created", "updated", "removed", "unchanged") if counts[k])
+                lines.append(f"{model}: {parts}")
+        return lines
+
+
+class RosterImporter:
+    def __init__(self, tournament=None, dry_run=False, batch_size=BATCH_SIZE):
+        self.default_tournament = tournament
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.report = ImportReport(dry_run)
+        # resolved objects, kept across batches
+        self.nations = {}
+        self.tournaments = {}
+        self.players = {}
+        self.teams = {}
+        self.squads = {}
+        self.rosters = defaultdict(set)  # squad id -> team ids in the file
+        # (tournament, nation) + seed / player pair -> first row listing it
+        self.seen_seeds = {}
+        self.seen_teams = {}
+
+    def run(self, rows):
+        """Import ``rows`` (dicts); returns the ImportReport. Nothing is written if any row is invalid."""
+        with transaction.atomic(), bulk_changes() as changed:
+            batch = []
+            for number, row in enumerate(rows, start=1):
+                parsed = self.parse(number, row)
+                if parsed:
+                    batch.append(parsed)
+                if len(batch) >= self.batch_size:
+                    self.import_batch(batch)
+                    batch = []
+            if batch:
+                self.import_batch(batch)
+            if not self.report.errors:
+                self.remove_stale_entries()
+            if self.dry_run or self.report.errors:
+                transaction.set_rollback(True)
+            else:
+                changed.update([DataVersion.PLAYERS, *(DataVersion.nation_scope(n.pk) for n in self.nations.values())])
+        return self.report
+
+    # --- parsing ---------------------------------------------------------
+
+    def parse(self, number, row):
+        self.report.rows += 1
+        if not isinstance(row, dict):
+            self.report.errors.append(f"row {number}: expected an object")
+            return None
+        try:
+            tournament = _text(row, "tournament") or self.default_tournament
+            if not tournament:
+                raise ValueError("no tournament given")
+            tournament = int(tournament)
+            seed = int(_text(row, "seed"))
+            if seed < 1:
+                raise ValueError("seed must be 1 or higher")
+            nation = _text(row, "nation").upper()
+            if not nation:
+                raise ValueError("no nation given")
+            players = []
+            for side in ("a", "b"):
+                first, last = _text(row, f"{side}_firstname"), _text(row, f"{side}_lastname")
+                if not first or not last:
+                    raise ValueError(f"player {side.upper()} needs first and last name")
+                attrs = {
+                    "eura_pro": _bool(row, f"{side}_eura_pro"),
+                    "playing_since": _date(row, f"{side}_playing_since"),
+                    "hometeam": _text(row, f"{side}_hometeam") or None,
+                }
+                players.append(((first, last, _date(row, f"{side}_birthdate")), attrs))
+            if players[0][0] == players[1][0]:
+                raise ValueError("both players are the same person")
+        except (ValueError, TypeError) as exc:
+            self.report.errors.append(f"row {number}: {exc}")
+            return None
+        return {"number": number, "tournament": tournament, "nation": nation, "seed": seed, "players": players}
+
+    # --- resolving and writing -------------------------------------------
+
+    def import_batch(self, batch):
+        self.resolve_reference_data(batch)
+        batch = [row for row in batch if self.check_references(row)]
+        if self.report.errors:
+            # keep validating the rest of the file, but stop writing
+            return
+        self.upsert_players(batch)
+        self.upsert_teams(batch)
+        self.upsert_squads(batch)
+        self.upsert_squad_teams(batch)
+
+    def resolve_reference_data(self, batch):
+        shorts = {row["nation"] for row in batch} - set(self.nations)
+        self.nations.update(Nation.objects.filter(short__in=shorts).in_bulk(field_name="short"))
+        ids = {row["tournament"] for row in batch} - set(self.tournaments)
+        self.tournaments.update(Tournament.objects.in_bulk(ids))
+
+    def check_references(self, row):
+        if row["nation"] not in self.nations:
+            self.report.errors.append(f"row {row['number']}: unknown nation {row['nation']!r}")
+            return False
+        if row["tournament"] not in self.tournaments:
+            self.report.errors.append(f"row {row['number']}: unknown tournament {row['tournament']}")
+            return False
+        squad = (row["tournament"], row["nation"])
+        first = self.seen_seeds.setdefault((*squad, row["seed"]), row["number"])
+        if first != row["number"]:
+            self.report.errors.append(f"row {row['number']}: seed {row['seed']} already given in row {first}")
+            return False
+        pair = frozenset(key for key, _ in row["players"])
+        first = self.seen_teams.setdefault((*squad, pair), row["number"])
+        if first != row["number"]:
+            self.report.errors.append(f"row {row['number']}: team already listed for this squad in row {first}")
+            return False
+        return True
+
+    def upsert_players(self, batch):
+        wanted = {}
+        for row in batch:
+            for key, attrs in row["players"]:
+                wanted.setdefault(key, {}).update({k: v for k, v in attrs.items() if v is not None})
+        missing = [key for key in wanted if key not in self.players]
+        if missing:
+            # lastname alone: with firstname__in too, SQLite probes the
+            # (lastname, firstname) index once per combination of both lists
+            missing = set(missing)
+            existing = Player.objects.filter(lastname__in={k[1] for k in missing}).order_by("id")
+            for player in existing:
+                key = (player.firstname, player.lastname, player.birthdate)
+                if key in missing:
+                    self.players.setdefault(key, player)
+
+        created, updated = [], []
+        for key, attrs in wanted.items():
+            player = self.players.get(key)
+            if player is None:
+                player = Player(firstname=key[0], lastname=key[1], birthdate=key[2],
+                                **{"eura_pro": False, "hometeam": "", **attrs})
+                self.players[key] = player
+                created.append(player)
+                self.report.changes.append(f"+ Player {player} ({key[2] or 'no birthdate'})")
+                continue
+            diff = {f: v for f, v in attrs.items() if getattr(player, f) != v}
+            if diff:
+                for field, value in diff.items():
+                    self.report.changes.append(f"~ Player {player}: {field} {getattr(player, field)!r} -> {value!r}")
+                    setattr(player, field, value)
+                updated.append(player)
+        Player.objects.bulk_create(created)
+        Player.objects.bulk_update(updated, PLAYER_FIELDS)
+        self.report.count(Player, "created", len(created))
+        self.report.count(Player, "updated", len(updated))
+
+    def upsert_teams(self, batch):
+        pairs = {}
+        for row in batch:
+            a, b = (self.players[key] for key, _ in row["players"])
+            pair = (min(a.pk, b.pk), max(a.pk, b.pk))
+            row["team_pair"] = pair
+            pairs.setdefault(pair, (a, b, self.tournaments[row["tournament"]].division))
+        missing = [pair for pair in pairs if pair not in self.teams]
+        if missing:
+            # leads with idx_team_pair_unordered; filtering hi__in as well
+            # would probe the index once per (lo, hi) combination
+            missing = set(missing)
+            existing = (
+                Team.objects
+                .annotate(lo=Least("playerA", "playerB"), hi=Greatest("playerA", "playerB"))
+                .filter(lo__in={p[0] for p in missing})
+            )
+            for team in existing:
+                if (team.lo, team.hi) in missing:
+                    self.teams[(team.lo, team.hi)] = team
+
+        created = []
+        for pair, (a, b, division) in pairs.items():
+            if pair not in self.teams:
+                team = Team(playerA=a, playerB=b, division=division)
+                self.teams[pair] = team
+                created.append(team)
+                self.report.changes.append(f"+ Team {a.lastname}/{b.lastname} ({division})")
+        Team.objects.bulk_create(created)
+        self.report.count(Team, "created", len(created))
+
+    def upsert_squads(self, batch):
+        wanted = {}
+        for row in batch:
+            nation = self.nations[row["nation"]]
+            wanted.setdefault((row["tournament"], nation.pk), nation)
+        missing = [key for key in wanted if key not in self.squads]
+        if missing:
+            existing = Squad.objects.filter(
+                tournament_id__in={k[0] for k in missing}, nation_id__in={k[1] for k in missing},
+            )
+            for squad in existing:
+                self.squads[(squad.tournament_id, squad.nation_id)] = squad
+        created = []
+        for key, nation in wanted.items():
+            if key not in self.squads:
+                squad = Squad(tournament=self.tournaments[key[0]], nation=nation)
+                self.squads[key] = squad
+                created.append(squad)
+                self.report.changes.append(f"+ Squad {squad.tournament.name}: {nation.short}")
+        Squad.objects.bulk_create(created)
+        self.report.count(Squad, "created", len(created))
+
+    def upsert_squad_teams(self, batch):
+        entries = {}
+        for row in batch:
+            squad = self.squads[(row["tournament"], self.nations[row["nation"]].pk)]
+            team = self.teams[row["team_pair"]]
+            entries[(squad.pk, team.pk)] = row["seed"]
+            self.rosters[squad.pk].add(team.pk)
+
+        current = {
+            (st.squad_id, st.team_id): st.seed
+            for st in SquadTeam.objects.filter(squad_id__in={k[0] for k in entries}, team_id__in={k[1] for k in entries})
+        }
+        changed = []
+        for (squad_id, team_id), seed in entries.items():
+            before = current.get((squad_id, team_id))
+            if before == seed:
+                self.report.count(SquadTeam, "unchanged")
+                continue
+            self.report.count(SquadTeam, "created" if before is None else "updated")
+            self.report.changes.append(
+                f"{'+' if before is None else '~'} SquadTeam squad {squad_id} team {team_id}: seed {before or '-'} -> {seed}"
+            )
+            changed.append(SquadTeam(squad_id=squad_id, team_id=team_id, seed=seed))
+        # (squad, team) is a real unique constraint on every backend
+        SquadTeam.objects.bulk_create(
+            changed, update_conflicts=True, unique_fields=["squad", "team"], update_fields=["seed"],
+        )
+
+    def remove_stale_entries(self):
+        """The file is the full list for every squad it mentions."""
+        current = (
+            SquadTeam.objects
+            .filter(squad_id__in=self.rosters)
+            .select_related("team__playerA", "team__playerB")
+        )
+        stale = [st for st in current if st.team_id not in self.rosters[st.squad_id]]
+        for st in stale:
+            self.report.changes.append(f"- SquadTeam squad {st.squad_id}: {st.team} (seed {st.seed})")
+        if stale:
+            SquadTeam.objects.filter(id__in=[st.id for st in stale]).delete()
+        self.report.count(SquadTeam, "removed", len(stale))
@@ -0,0 +1,34 @@
+from .archive import ARCHIVE_DB
+
+
+class ArchiveReadOnlyError(Exception):
+    pass
+
+
+class ArchiveRouter:
+    """
+    Keeps the site on the hot ``default`` database. The ``archive`` database
+    (finished tournaments, see knowledgedb/archive.py) is only read when a
+    queryset asks for it with ``.using(ARCHIVE_DB)``; saving or deleting an
+    object loaded from it is refused. ``archive_tournaments`` fills it with
+    explicit ``using`` writes, which routers do not see.
+    """
+
+    def db_for_read(self, model, **hints):
+        return None
+
+    def db_for_write(self, model, **hints):
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db == ARCHIVE_DB:
+            raise ArchiveReadOnlyError(f"{model.__name__} objects from the archive are read-only.")
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if ARCHIVE_DB in (obj1._state.db, obj2._state.db):
+            return obj1._state.db == obj2._state.db
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == ARCHIVE_DB:
+            return app_label == "knowledgedb"
+        return None
@@ -0,0 +1,162 @@
+"""
+Synthetic, deterministic data for query audits, benchmarks and tests.
+
+``seed()`` fills the current database; ``seeded_test_database()`` does the
+same on a throwaway test database so tooling never touches db.sqlite3.
+"""
+import datetime
+import random
+from contextlib import contextmanager
+
+from django.db import connection
+from django.urls import URLPattern, reverse
+
+from .models import DataVersion, Divisions, Nation, Player, Squad, SquadTeam, Team, Tournament
+
+# teams per squad, as in the division tables
+SQUAD_SIZES = {Divisions.COED: 4, Divisions.OPEN: 6, Divisions.WOMEN: 6}
+
+
+def _short(i):
+    return "".join(chr(65 + (i // 26 ** k) % 26) for k in (2, 1, 0))
+
+
+def seed(nations=8, players_per_nation=12, seasons=3, last_season=2025, rng_seed=1):
+    """
+    Every nation sends a squad to every tournament; one tournament per
+    division per season. Returns the created tournaments.
+    """
+    rng = random.Random(rng_seed)
+    divisions = list(Divisions)
+    # offsets keep codes and names unique when seeding on top of earlier data
+    first_nation = Nation.objects.count()
+    first_player = Player.objects.count()
+
+    nation_objs = Nation.objects.bulk_create(
+        Nation(name=f"Nation {_short(i)}", short=_short(i), flag_emoji="")
+        for i in range(first_nation, first_nation + nations)
+    )
+    players = Player.objects.bulk_create(
+        Player(
+            firstname=f"First{i}",
+            lastname=f"Last{i}",
+            birthdate=datetime.date(1985 + rng.randrange(20), rng.randrange(1, 13), 1),
+            playing_since=datetime.date(2012 + rng.randrange(12), 1, 1),
+            eura_pro=rng.random() < 0.3,
+            hometeam=f"Club {i % 17}",
+        )
+        for i in range(first_player, first_player + nations * players_per_nation)
+    )
+
+    # per nation and division: pairs (i, i + k) with a different k per
+    # division, which keeps every unordered pair unique
+    teams = {}
+    new_teams = []
+    for n, nation in enumerate(nation_objs):
+        roster = players[n * players_per_nation:(n + 1) * players_per_nation]
+        for k, division in enumerate(divisions, start=1):
+            for i in range(0, players_per_nation, 2):
+                team = Team(
+                    playerA=roster[i],
+                    playerB=roster[(i + k) % players_per_nation],
+                    division=division,
+                )
+                teams.setdefault((nation.pk, division), []).append(team)
+                new_teams.append(team)
+    Team.objects.bulk_create(new_teams)
+
+    mates = Player.normal_teammate.through
+    mates.objects.bulk_create(
+        mates(from_player_id=t.playerA_id, to_player_id=t.playerB_id)
+        for t in new_teams if t.division == Divisions.OPEN
+    )
+
+    tournaments = Tournament.objects.bulk_create(
+        Tournament(
+            start_date=datetime.date(year, 8, 1 + d),
+            end_date=datetime.date(year, 8, 3 + d),
+            name=f"EUROS {year}",
+            location=f"City {year}",
+            division=division,
+        )
+        for year in range(last_season - seasons + 1, last_season + 1)
+        for d, division in enumerate(divisions)
+    )
+    squads = Squad.objects.bulk_create(
+        Squad(tournament=t, nation=n) for t in tournaments for n in nation_objs
+    )
+    squad_teams = []
+    for squad in squads:
+        pool = teams[(squad.nation.pk, squad.tournament.division)]
+        size = SQUAD_SIZES[squad.tournament.division]
+        for seed_no, team in enumerate(rng.sample(pool, min(size, len(pool))), start=1):
+            squad_teams.append(SquadTeam(squad=squad, team=team, seed=seed_no))
+    SquadTeam.objects.bulk_create(squad_teams)
+    DataVersion.bump(DataVersion.NATIONS, DataVersion.TOURNAMENTS, DataVersion.PLAYERS)
+    return tournaments
+
+
+def _samples():
+    nation = Nation.objects.order_by("id").first()
+    squad = Squad.objects.order_by("id").first()
+    opponent = (
+        Squad.objects.filter(tournament=squad.tournament).exclude(id=squad.id).first()
+        if squad else None
+    )
+    samples = {
+        # staff only, POST driven
+        "roster-import": [],
+        "divisions_detail": [
+            reverse("divisions_detail", kwargs={"division_slug": d}) for d in Divisions.values
+        ],
+    }
+    if nation:
+        samples["nations_detail"] = [reverse("nations_detail", kwargs={"short": nation.short})]
+        samples["nations_scouting"] = [reverse("nations_scouting", kwargs={"short": nation.short})]
+        samples["nations_scouting_json"] = [reverse("nations_scouting_json", kwargs={"short": nation.short})]
+    if squad:
+        samples["tournaments_detail"] = [reverse("tournaments_detail", kwargs={"id": squad.tournament_id})]
+        samples["squads_detail"] = [reverse("squads_detail", kwargs={"id": squad.id})]
+    if squad and opponent:
+        samples["squad-match"] = [f"{reverse('squad-match')}?s1={squad.id}&s2={opponent.id}"]
+    return samples
+
+
+def sample_paths():
+    """
+    ``(url name, path)`` for every named pattern in knowledgedb/urls.py.
+    Patterns with arguments need an entry in ``_samples()``; without one
+    their path is None.
+    """
+    from . import urls
+
+    samples = _samples()
+    for pattern in urls.urlpatterns:
+        if not isinstance(pattern, URLPattern) or not pattern.name:
+            continue
+        if pattern.name in samples:
+            for path in samples[pattern.name]:
+                yield pattern.name, path
+        elif not pattern.pattern.converters:
+            yield pattern.name, reverse(pattern.name)
+        else:
+            yield pattern.name, None
+
+
+@contextmanager
+def seeded_test_database(**sizes):
+    """
+    Create a test database (in memory for SQLite), seed it and drop it
+    again on exit.
+    """
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        seed(**sizes)
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
@@ -0,0 +1,133 @@
+"""
+Scouting figures for one nation: one row per squad (a tournament in one
+division), grouped by division.
+
+Everything per squad is computed by the database in one grouped query:
+conditional ``Count`` for pros and ``Sum``/``Count`` of age and experience
+durations at the tournament start. A ``Lag`` window finds the squad the
+nation sent to the previous tournament of the same division, and a third
+query lists the squads' players to measure roster turnover against it.
+
+Player figures count seats: a player in two teams of one squad would count
+twice, which rosters never do.
+"""
+import datetime
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum, Window
+from django.db.models.functions import Lag
+
+from .models import DataVersion, Divisions, Squad, SquadTeam
+
+# versioned keys go stale by themselves; this only bounds memory
+SCOUTING_CACHE_TIMEOUT = 60 * 60 * 24
+
+_SIDES = ("A", "B")
+
+
+def _player(side, field):
+    return f"squad_teams__team__player{side}__{field}"
+
+
+def _since_start(side, field):
+    """Time from a player's date ``field`` to the tournament start."""
+    return ExpressionWrapper(F("tournament__start_date") - F(_player(side, field)), output_field=DurationField())
+
+
+def _per_side(name, expression):
+    return {f"{name}_{side}": expression(side) for side in _SIDES}
+
+
+def _average_years(row, name):
+    count = sum(row[f"{name}_count_{side}"] for side in _SIDES)
+    if not count:
+        return None
+    total = sum((row[f"{name}_sum_{side}"] or datetime.timedelta() for side in _SIDES), datetime.timedelta())
+    return round(total.days / 365.25 / count, 1)
+
+
+def _squad_rows(nation, using):
+    return (
+        Squad.objects.using(using)
+        .filter(nation=nation)
+        .values("id", "tournament_id", "tournament__name", "tournament__start_date", "tournament__division")
+        .annotate(
+            teams=Count("squad_teams", distinct=True),
+            **_per_side("players", lambda side: Count(_player(side, "id"), distinct=True)),
+            **_per_side("pros", lambda side: Count("squad_teams", filter=Q(**{_player(side, "eura_pro"): True}))),
+            **_per_side("age_sum", lambda side: Sum(_since_start(side, "birthdate"))),
+            **_per_side("age_count", lambda side: Count(_player(side, "birthdate"))),
+            **_per_side("experience_sum", lambda side: Sum(_since_start(side, "playing_since"))),
+            **_per_side("experience_count", lambda side: Count(_player(side, "playing_since"))),
+        )
+        .order_by("tournament__division", "-tournament__start_date", "-tournament_id")
+    )
+
+
+def _previous_squads(nation, using):
+    # a separate query: Django groups by window expressions, which SQLite
+    # rejects next to aggregates
+    return dict(
+        Squad.objects.using(using)
+        .filter(nation=nation)
+        .annotate(previous=Window(
+            Lag("id"),
+            partition_by=[F("tournament__division")],
+            order_by=[F("tournament__start_date").asc(), F("tournament_id").asc()],
+        ))
+        .values_list("id", "previous")
+    )
+
+
+def _rosters(nation, using):
+    rosters = defaultdict(set)
+    seats = SquadTeam.objects.using(using).filter(squad__nation=nation)
+    for squad_id, a, b in seats.values_list("squad_id", "team__playerA_id", "team__playerB_id"):
+        rosters[squad_id].update((a, b))
+    return rosters
+
+
+def scouting_report(nation, using=DEFAULT_DB_ALIAS):
+    """Plain dicts and lists (JSON-ready), newest tournament first per division."""
+    rosters = _rosters(nation, using)
+    previous_squads = _previous_squads(nation, using)
+    labels = dict(Divisions.choices)
+    divisions = {}
+    for row in _squad_rows(nation, using):
+        division = row["tournament__division"]
+        roster = rosters.get(row["id"], set())
+        previous_squad = previous_squads.get(row["id"])
+        previous = rosters.get(previous_squad, set()) if previous_squad else None
+        returning = len(roster & previous) if previous is not None else None
+        entry = divisions.setdefault(division, {"division": division, "label": str(labels[division]), "tournaments": []})
+        entry["tournaments"].append({
+            "squad": row["id"],
+            "tournament": row["tournament_id"],
+            "name": row["tournament__name"],
+            "start_date": row["tournament__start_date"].isoformat(),
+            "teams": row["teams"],
+            "players": row["players_A"] + row["players_B"],
+            "pros": row["pros_A"] + row["pros_B"],
+            "average_age": _average_years(row, "age"),
+            "average_experience": _average_years(row, "experience"),
+            "returning": returning,
+            "turnover": round(1 - returning / len(roster), 2) if returning is not None and roster else None,
+        })
+    return {
+        "nation": nation.short,
+        "name": nation.name,
+        "divisions": [divisions[d] for d in Divisions.values if d in divisions],
+    }
+
+
+def cached_scouting_report(nation, using=DEFAULT_DB_ALIAS):
+    """``scouting_report``, cached until the nation's squads or any player or tournament change."""
+    versions = DataVersion.current(DataVersion.nation_scope(nation.pk), DataVersion.PLAYERS, DataVersion.TOURNAMENTS)
+    key = f"scouting:{using}:{nation.pk}:{'.'.join(map(str, versions))}"
+    report = cache.get(key)
+    if report is None:
+        report = scouting_report(nation, using)
+        cache.set(key, report, SCOUTING_CACHE_TIMEOUT)
+    return report
@@ -0,0 +1,81 @@
+"""
+Keeps DataVersion counters in step with model changes, so caches keyed on
+them (scouting reports, reference data) never serve stale data.
+
+``bulk_create``, ``bulk_update`` and ``QuerySet.update()`` send no
+signals, and ``QuerySet.delete()`` sends them per object, which would cost
+a bump (and for seeds a lookup) per row. Bulk writers (roster import,
+archiving) therefore run inside ``bulk_changes()``: the receivers stand
+aside and the writer bumps the scopes it touched once at the end.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .archive import ARCHIVE_DB
+from .models import DataVersion, Nation, Player, Squad, SquadTeam, Team, Tournament
+
+
+_bulk = ContextVar("bulk_changes", default=None)
+
+
+@contextmanager
+def bulk_changes():
+    """
+    Skip the receivers inside the block; yields a set the writer adds the
+    changed scopes to, which are bumped once when the block succeeds.
+    """
+    scopes = set()
+    token = _bulk.set(scopes)
+    try:
+        yield scopes
+    finally:
+        _bulk.reset(token)
+    DataVersion.bump(*scopes)
+
+
+def _active(using):
+    # the archive is filled by archive_tournaments, which bumps on its own
+    return using != ARCHIVE_DB and _bulk.get() is None
+
+
+def _bump(scopes, using):
+    if _active(using):
+        DataVersion.bump(*scopes)
+
+
+@receiver([post_save, post_delete], sender=Nation)
+def nation_changed(sender, instance, using, **kwargs):
+    _bump([DataVersion.NATIONS, DataVersion.nation_scope(instance.pk)], using)
+
+
+@receiver([post_save, post_delete], sender=Tournament)
+def tournament_changed(sender, instance, using, **kwargs):
+    _bump([DataVersion.TOURNAMENTS], using)
+
+
+@receiver([post_save, post_delete], sender=Player)
+@receiver([post_save, post_delete], sender=Team)
+def player_changed(sender, instance, using, **kwargs):
+    _bump([DataVersion.PLAYERS], using)
+
+
+@receiver(m2m_changed, sender=Player.normal_teammate.through)
+def teammates_changed(sender, instance, action, using, **kwargs):
+    if action.startswith("post_"):
+        _bump([DataVersion.PLAYERS], using)
+
+
+@receiver([post_save, post_delete], sender=Squad)
+def squad_changed(sender, instance, using, **kwargs):
+    _bump([DataVersion.nation_scope(instance.nation_id)], using)
+
+
+@receiver([post_save, post_delete], sender=SquadTeam)
+def squad_team_changed(sender, instance, using, **kwargs):
+    if not _active(using):
+        return
+    nation_ids = Squad.objects.using(using).filter(pk=instance.squad_id).values_list("nation_id", flat=True)
+    _bump([DataVersion.nation_scope(n) for n in nation_ids], using)
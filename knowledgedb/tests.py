@@ -1,3 +1,545 @@
-from django.test import TestCase
+import datetime
+import gzip
+import io
+import unittest
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import archive, refdata, views, warmup
+from .archive import ARCHIVE_DB, archive_tournaments
+from .identity import find_duplicates, merge_players
+from .lazyload import LazyLoadError, guard
+from .middleware import HTMLCompressionMiddleware, brotli, minify_html
+from .pagination import _seek_condition, encode_cursor
+from .models import DataVersion, Nation, Player, Squad, SquadTeam, Team, Tournament
+from .routers import ArchiveReadOnlyError
+from .roster_import import RosterImporter, RosterImportError, iter_rows
+from .sampledata import SQUAD_SIZES, sample_paths, seed
+from .scouting import cached_scouting_report, scouting_report
+from .signals import bulk_changes
+
+
+class FreshCachesTestCase(TestCase):
+    """
+    Per-process caches are keyed on DataVersion counters, which roll back
+    with each test; start every test with empty ones. Tests that do not use
+    the archive database see no archive.
+    """
+
+    def setUp(self):
+        cache.clear()
+        refdata.reset()
+        archive.reset()
+        if ARCHIVE_DB not in self.databases:
+            patcher = mock.patch.object(archive, "_archive_tables_exist", return_value=False)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+@override_settings(LAZYLOAD_GUARD="raise")
+class LazyLoadTests(FreshCachesTestCase):
+    """Every page renders without lazily loading a relation."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(nations=3, seasons=2)
+
+    def query_counts(self):
+        counts = {}
+        for name, path in sample_paths():
+            self.assertIsNotNone(path, f"no sample arguments for {name}")
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(path)
+            self.assertEqual(response.status_code, 200, path)
+            counts[path] = len(ctx.captured_queries)
+        return counts
+
+    def match_query_count(self):
+        squad = Squad.objects.order_by("id").first()
+        opponent = Squad.objects.filter(tournament=squad.tournament).exclude(id=squad.id).first()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse("squad-match"), {"squad1": squad.id, "squad2": opponent.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.context["matchups"])
+        return len(ctx.captured_queries)
+
+    def test_pages_do_not_lazy_load(self):
+        # LazyLoadGuardMiddleware raises on the first lazy load
+        self.query_counts()
+        self.match_query_count()
+
+    def test_query_count_does_not_grow_with_data(self):
+        before = self.query_counts()
+        match_before = self.match_query_count()
+        seed(nations=5, seasons=2, rng_seed=2)
+        self.assertEqual(self.query_counts(), before)
+        self.assertEqual(self.match_query_count(), match_before)
+
+    def test_guard_reports_lazy_loads(self):
+        squad = Squad.objects.first()
+        with guard("raise"), self.assertRaises(LazyLoadError):
+            squad.tournament
+        with guard("raise"), self.assertRaises(LazyLoadError):
+            list(squad.squad_teams.all())
+        for derived in (lambda: squad.squad_teams.first(), lambda: squad.squad_teams.filter(seed=1).count(),
+                        lambda: squad.squad_teams.exists()):
+            with guard("raise"), self.assertRaises(LazyLoadError):
+                derived()
+        squad = Squad.objects.select_related("tournament").prefetch_related("squad_teams").first()
+        with guard("raise"):
+            squad.tournament
+            list(squad.squad_teams.all())
+
+    def test_shared_match_link_shows_matchups(self):
+        squad = Squad.objects.order_by("id").first()
+        opponent = Squad.objects.filter(tournament=squad.tournament).exclude(id=squad.id).first()
+        response = self.client.get(reverse("squad-match"), {"s1": squad.id, "s2": opponent.id})
+        self.assertTrue(response.context["matchups"])
+
+    def test_audit_queries_explains_every_page(self):
+        out = io.StringIO()
+        call_command("audit_queries", "--existing", stdout=out, stderr=io.StringIO())
+        report = out.getvalue()
+        for name, path in sample_paths():
+            self.assertIn(f"GET {path} ", report)
+        # the matchup queries, not only the form's dropdowns
+        match_line = next(line for line in report.splitlines() if line.startswith("GET /squads/match/"))
+        self.assertGreater(int(match_line.split("(")[1].split()[0]), 4)
+
+    def test_tournament_sheet_has_a_column_per_squad(self):
+        tournament = Tournament.objects.order_by("id").first()
+        refdata.store()
+        # squads and seeds; tournament and nations come from the reference store
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("tournaments_detail", args=[tournament.id]))
+        self.assertEqual(len(response.context["squads"]), tournament.squads.count())
+        self.assertEqual(
+            [(seed, len(row)) for seed, row in response.context["rows"]],
+            [(seed, tournament.squads.count()) for seed in range(1, SQUAD_SIZES[tournament.division] + 1)],
+        )
+
+    def test_tournament_sheet_keeps_seed_gaps(self):
+        tournament = Tournament.objects.order_by("id").first()
+        squad = tournament.squads.order_by("id").first()
+        squad.squad_teams.filter(seed=2).delete()
+        response = self.client.get(reverse("tournaments_detail", args=[tournament.id]))
+        column = response.context["squads"].index(squad)
+        seeds = {seed: row[column] for seed, row in response.context["rows"]}
+        self.assertIsNone(seeds[2])
+        self.assertEqual(seeds[3].seed, 3)
+        self.assertContains(response, '<td class="py-1">3</td>', html=True)
+
+    def test_tournament_sheet_shows_squads_without_seeds(self):
+        tournament = Tournament.objects.order_by("id").first()
+        squad = tournament.squads.order_by("id").first()
+        squad.squad_teams.all().delete()
+        response = self.client.get(reverse("tournaments_detail", args=[tournament.id]))
+        column = response.context["squads"].index(squad)
+        self.assertEqual(len(response.context["squads"]), tournament.squads.count())
+        self.assertEqual({row[column] for _, row in response.context["rows"]}, {None})
+
+
+class PaginationTests(FreshCachesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(nations=5, seasons=3)
+
+    def walk(self, path, **params):
+        """All ?partial=1 responses, following their X-Next-Page headers."""
+        pages, url = [], f"{path}?partial=1"
+        while url:
+            response = self.client.get(url, params if len(pages) == 0 else None)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response)
+            url = response.get("X-Next-Page")
+            if url:
+                self.assertNotIn("partial", url)
+                url += "&partial=1"
+        return pages
+
+    def test_nations_pages_cover_every_nation_once(self):
+        with mock.patch.object(views, "NATIONS_PER_PAGE", 2):
+            first = self.client.get(reverse("nations"))
+            self.assertIn("?after=", first.context["next_url"])
+            pages = self.walk(reverse("nations"))
+        names = [n.name for page in pages for n in page.context["nations"]]
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(names, sorted(Nation.objects.values_list("name", flat=True)))
+
+    def test_start_filters_by_season_and_division(self):
+        with mock.patch.object(views, "TOURNAMENTS_PER_PAGE", 2):
+            pages = self.walk(reverse("start"), season=2024, division="open")
+        tournaments = [t for page in pages for t in page.context["tournaments"]]
+        self.assertEqual([(t.start_date.year, t.division) for t in tournaments], [(2024, "open")])
+        self.assertEqual(self.client.get(reverse("start"), {"division": "nope"}).status_code, 404)
+        self.assertEqual(self.client.get(reverse("start"), {"season": "x"}).status_code, 404)
+
+    def test_division_pages_by_tournament_and_season(self):
+        url = reverse("divisions_detail", args=["women"])
+        pages = self.walk(url)
+        seen = [s.tournament_id for page in pages for s in page.context["squads"]]
+        women = list(Tournament.objects.filter(division="women").order_by("-start_date").values_list("id", flat=True))
+        self.assertEqual(list(dict.fromkeys(seen)), women)
+
+        tournament = women[-1]
+        squads = self.client.get(url, {"tournament": tournament}).context["squads"]
+        self.assertEqual({s.tournament_id for s in squads}, {tournament})
+        squads = self.client.get(url, {"season": 2025}).context["squads"]
+        self.assertEqual({s.tournament.start_date.year for s in squads}, {2025})
+
+    def test_cursor_seeks_into_the_index(self):
+        # a later page starts inside the index instead of scanning up to it
+        nation = Nation.objects.order_by("name", "id")[1]
+        plan = (Nation.objects.filter(_seek_condition(["name", "id"], [nation.name, nation.pk]))
+                .order_by("name", "id").explain())
+        self.assertRegex(plan, r"SEARCH \S+ USING INDEX \S+ \(name>\?\)")
+        tournament = Tournament.objects.filter(division="open").order_by("-start_date", "-id")[1]
+        plan = (Tournament.objects.filter(division="open")
+                .filter(_seek_condition(["-start_date", "-id"], [tournament.start_date, tournament.pk]))
+                .order_by("-start_date", "-id").explain())
+        self.assertRegex(plan, r"SEARCH \S+ USING INDEX \S+ \(division=\? AND start_date<\?\)")
+
+    def test_tampered_cursors_are_404(self):
+        for path, values in [
+            (reverse("nations"), ["a", "b"]),
+            (reverse("nations"), [None, None]),
+            (reverse("nations"), ["a"]),
+            (reverse("start"), ["notadate", 1]),
+            (reverse("start"), [{"x": 1}, 1]),
+        ]:
+            with self.subTest(path=path, values=values):
+                response = self.client.get(path, {"after": encode_cursor(values)})
+                self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.client.get(reverse("nations"), {"after": "%%%"}).status_code, 404)
+
+
+class CompressionTests(FreshCachesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(nations=2, seasons=1)
+
+    def test_minify_keeps_verbatim_blocks(self):
+        html = "<p>a  \n  b</p><!-- note --><pre> x\n  y </pre><script>var a =  1;</script>"
+        self.assertEqual(minify_html(html), "<p>a\nb</p><pre> x\n  y </pre><script>var a =  1;</script>")
+
+    def test_minify_keeps_attribute_values(self):
+        html = '<input  value="a  b"\n  title=\'x > y\'>  <b>c</b>'
+        self.assertEqual(minify_html(html), '<input  value="a  b"\n  title=\'x > y\'> <b>c</b>')
+
+    def test_html_is_minified_and_gzipped(self):
+        plain = self.client.get(reverse("nations"))
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertNotIn(b"<!--", plain.content)
+
+        response = self.client.get(reverse("nations"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    @unittest.skipIf(brotli is None, "brotli is not installed")
+    def test_html_is_brotli_compressed(self):
+        plain = self.client.get(reverse("nations"))
+        response = self.client.get(reverse("nations"), HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+
+    @unittest.skipIf(brotli is None, "brotli is not installed")
+    def test_pages_with_csrf_token_keep_padded_gzip(self):
+        # BREACH: only gzip output gets random padding
+        response = self.client.get(reverse("squad-match"), HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn(b"csrfmiddlewaretoken", gzip.decompress(response.content))
+
+    def test_streaming_responses_are_compressed(self):
+        chunks = [b"<p>%d</p>\n" % i * 50 for i in range(5)]
+        encodings = [("gzip", gzip.decompress)]
+        if brotli is not None:
+            encodings.append(("br", brotli.decompress))
+        for encoding, decompress in encodings:
+            with self.subTest(encoding=encoding):
+                request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=encoding)
+                middleware = HTMLCompressionMiddleware(lambda r: StreamingHttpResponse(iter(chunks)))
+                response = middleware(request)
+                self.assertEqual(response["Content-Encoding"], encoding)
+                self.assertFalse(response.has_header("Content-Length"))
+                self.assertEqual(decompress(b"".join(response.streaming_content)), b"".join(chunks))
+
+
+class RosterImportTests(TestCase):
+    HEADER = "tournament,nation,seed,a_firstname,a_lastname,a_birthdate,a_eura_pro,b_firstname,b_lastname,b_birthdate,b_eura_pro\n"
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(nations=2, seasons=1)
+        cls.squad = Squad.objects.select_related("nation").order_by("id").first()
+
+    def run_import(self, body, **kwargs):
+        stream = io.StringIO(self.HEADER + body)
+        return RosterImporter(**kwargs).run(iter_rows(stream, "csv"))
+
+    def rows(self, eura_pro="no"):
+        t, n = self.squad.tournament_id, self.squad.nation.short
+        known = Player.objects.get(firstname="First0", lastname="Last0")
+        return (
+            f"{t},{n},1,Anna,Muster,1994-03-02,{eura_pro},Ben,Beispiel,,no\n"
+            f"{t},{n},2,First0,Last0,{known.birthdate},yes,Carla,Neu,1999-01-01,no\n"
+        )
+
+    def test_dry_run_writes_nothing(self):
+        before = list(self.squad.squad_teams.values_list("team_id", "seed"))
+        report = self.run_import(self.rows(), dry_run=True)
+        self.assertEqual(report.errors, [])
+        self.assertEqual(report.counts["SquadTeam"]["created"], 2)
+        self.assertEqual(list(self.squad.squad_teams.values_list("team_id", "seed")), before)
+        self.assertFalse(Player.objects.filter(lastname="Muster").exists())
+
+    def test_import_replaces_roster_and_upserts(self):
+        report = self.run_import(self.rows())
+        self.assertEqual(report.errors, [])
+        self.assertEqual(report.counts["Player"]["created"], 3)
+        self.assertEqual(
+            sorted(self.squad.squad_teams.values_list("seed", flat=True)), [1, 2],
+        )
+
+        report = self.run_import(self.rows(eura_pro="yes"))
+        self.assertEqual(report.counts["Player"]["updated"], 1)
+        self.assertEqual(report.counts["SquadTeam"]["unchanged"], 2)
+        self.assertTrue(Player.objects.get(lastname="Muster").eura_pro)
+
+    def test_invalid_rows_abort_the_import(self):
+        report = self.run_import(self.rows() + f"{self.squad.tournament_id},XXX,3,A,B,,no,C,D,,no\n")
+        self.assertEqual(report.errors, ["row 3: unknown nation 'XXX'"])
+        self.assertFalse(Player.objects.filter(lastname="Muster").exists())
+
+    def test_unreadable_files_are_reported(self):
+        t, n = self.squad.tournament_id, self.squad.nation.short
+        latin1 = (self.HEADER + f"{t},{n},1,Jörg,Müller,,no,Ben,Beispiel,,no\n").encode("latin-1")
+        self.client.force_login(User.objects.create_user("staff", is_staff=True))
+        response = self.client.post(reverse("roster-import"), {
+            "file": SimpleUploadedFile("roster.csv", latin1), "dry_run": "on",
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["form"].errors["file"], ["The file is not UTF-8 encoded."])
+
+        with self.assertRaisesMessage(RosterImportError, "field larger than field limit"):
+            self.run_import("x" * 200000 + "\n")
+        stream = io.StringIO('[1, 2]\n{"tournament": "x"}\n')
+        report = RosterImporter().run(iter_rows(stream, "jsonl"))
+        self.assertEqual(report.errors[0], "row 1: expected an object")
+
+    def test_duplicate_seeds_and_teams_are_rejected(self):
+        t, n = self.squad.tournament_id, self.squad.nation.short
+        rows = self.rows() + (
+            f"{t},{n},1,Dora,Doppelt,,no,Emil,Doppelt,,no\n"
+            f"{t},{n},4,Ben,Beispiel,,no,Anna,Muster,1994-03-02,no\n"
+        )
+        # the duplicates sit in a later batch than the rows they repeat
+        report = self.run_import(rows, batch_size=2)
+        self.assertEqual(report.errors, [
+            "row 3: seed 1 already given in row 1",
+            "row 4: team already listed for this squad in row 1",
+        ])
+        self.assertFalse(Player.objects.filter(lastname="Muster").exists())
+
+
+class DuplicatePlayerTests(TestCase):
+    def test_find_and_merge_spelling_variant(self):
+        keep = Player.objects.create(firstname="José", lastname="Müller", birthdate=datetime.date(1990, 5, 1), eura_pro=False)
+        duplicate = Player.objects.create(firstname="Jose", lastname="Mueller", eura_pro=True, hometeam="Köln")
+        Player.objects.create(firstname="Josefine", lastname="Maier", birthdate=datetime.date(1990, 5, 2), eura_pro=False)
+        partner = Player.objects.create(firstname="Anna", lastname="Schmidt", eura_pro=False)
+        self.assertEqual([(a, b) for _, a, b in find_duplicates()], [(keep.pk, duplicate.pk)])
+
+        team = Team.objects.create(playerA=duplicate, playerB=partner, division="open")
+        duplicate.normal_teammate.add(partner)
+        merge_players(keep, duplicate)
+
+        team.refresh_from_db()
+        self.assertEqual(team.playerA, keep)
+        self.assertEqual(list(keep.normal_teammate.all()), [partner])
+        keep.refresh_from_db()
+        self.assertEqual((keep.eura_pro, keep.hometeam), (True, "Köln"))
+        self.assertFalse(Player.objects.filter(pk=duplicate.pk).exists())
+
+
+class ArchiveTests(FreshCachesTestCase):
+    databases = {"default", ARCHIVE_DB}
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(nations=2, seasons=2, last_season=2025)
+
+    def test_old_tournaments_move_to_the_archive(self):
+        old = list(Tournament.objects.filter(end_date__lt=datetime.date(2025, 1, 1)))
+        squad = Squad.objects.filter(tournament__in=old).first()
+        seeds = squad.squad_teams.count()
+        unseeded = set(Team.objects.filter(squad_teams__isnull=True).values_list("pk", flat=True))
+        counts = archive_tournaments(datetime.date(2025, 1, 1))
+
+        self.assertEqual(counts["tournaments"], len(old))
+        self.assertFalse(Tournament.objects.filter(pk__in=[t.pk for t in old]).exists())
+        self.assertFalse(Squad.objects.filter(pk=squad.pk).exists())
+        self.assertTrue(Tournament.objects.exists())
+        # teams only seeded in archived squads left the hot database
+        self.assertEqual(set(Team.objects.filter(squad_teams__isnull=True).values_list("pk", flat=True)), unseeded)
+        self.assertEqual(SquadTeam.objects.using(ARCHIVE_DB).filter(squad=squad.pk).count(), seeds)
+
+        self.assertEqual(self.client.get(reverse("squads_detail", args=[squad.pk])).status_code, 404)
+        response = self.client.get(reverse("squads_detail", args=[squad.pk]), {"archive": "1"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["archive"])
+
+        archived = Tournament.objects.using(ARCHIVE_DB).get(pk=old[0].pk)
+        with self.assertRaises(ArchiveReadOnlyError):
+            archived.save()
+
+    def test_command_creates_the_archive(self):
+        # no archive tables yet: the command is what creates them
+        with mock.patch.object(archive, "_archive_tables_exist", return_value=False):
+            out = io.StringIO()
+            call_command("archive_tournaments", "--before", "2025-01-01", stdout=out)
+        self.assertTrue(out.getvalue().startswith("Moved "))
+        self.assertTrue(Tournament.objects.using(ARCHIVE_DB).exists())
+        self.assertTrue(archive.archive_available())
+
+    def test_no_archive_before_the_first_run(self):
+        nation = Nation.objects.order_by("id").first()
+        with mock.patch.object(archive, "_archive_tables_exist", return_value=False):
+            self.assertEqual(self.client.get(reverse("start"), {"archive": "1"}).status_code, 404)
+            response = self.client.get(reverse("nations_detail", args=[nation.short]))
+            self.assertNotContains(response, "?archive=1")
+            self.assertNotContains(self.client.get(reverse("start")), "?archive=1")
+
+        archive.reset()
+        self.assertContains(self.client.get(reverse("start")), "/?archive=1")
+
+
+class ScoutingReportTests(FreshCachesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(nations=2, seasons=2)
+        cls.nation = Nation.objects.order_by("id").first()
+
+    def test_report_figures(self):
+        with self.assertNumQueries(3):
+            report = scouting_report(self.nation)
+        coed = report["divisions"][0]
+        self.assertEqual(coed["division"], "coed")
+        latest, first = coed["tournaments"]
+        self.assertEqual((latest["teams"], latest["players"]), (4, 8))
+        self.assertIsNone(first["turnover"])
+        squad = Squad.objects.get(pk=latest["squad"])
+        pros = sum(st.team.playerA.eura_pro + st.team.playerB.eura_pro
+                   for st in squad.squad_teams.select_related("team__playerA", "team__playerB"))
+        self.assertEqual(latest["pros"], pros)
+
+    def test_cache_follows_data_changes(self):
+        report = cached_scouting_report(self.nation)
+        with self.assertNumQueries(1):
+            self.assertEqual(cached_scouting_report(self.nation), report)
+        squad_team = SquadTeam.objects.filter(squad__nation=self.nation).order_by("id").first()
+        squad_team.delete()
+        report = cached_scouting_report(self.nation)
+        teams = {t["squad"]: t["teams"] for d in report["divisions"] for t in d["tournaments"]}
+        self.assertEqual(teams[squad_team.squad_id], Squad.objects.get(pk=squad_team.squad_id).squad_teams.count())
+
+
+class WarmupTests(FreshCachesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(nations=2, seasons=1)
+
+    def test_steps_run(self):
+        # warm_up() itself closes the connection, which a TestCase cannot have
+        for step in warmup.STEPS:
+            with self.subTest(step=step.__name__), self.assertNoLogs("knowledgedb.warmup"):
+                self.assertIsNotNone(step())
+
+
+class ReferenceDataTests(FreshCachesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(nations=2, seasons=1)
+
+    def test_store_reloads_when_data_changes(self):
+        nation = Nation.objects.order_by("id").first()
+        refs = refdata.store()
+        self.assertEqual(refs.nation(nation.pk).name, nation.name)
+        with self.assertNumQueries(0):
+            refdata.store()
+
+        with override_settings(REFDATA_CHECK_INTERVAL=0):
+            # only the version check while nothing changed
+            with self.assertNumQueries(1):
+                refdata.store()
+            nation.name = "Renamed"
+            nation.save()
+            refdata.store()
+        self.assertEqual(refs.nations_by_short[nation.short].name, "Renamed")
+
+    def test_unknown_ids_do_not_reload(self):
+        refs = refdata.store()
+        unknown = Tournament.objects.order_by("-id").first().pk + 1
+        # one version check, no reload
+        with self.assertNumQueries(1):
+            self.assertIsNone(refs.tournament(unknown))
+        with self.assertNumQueries(0):
+            self.assertIsNone(refs.tournament(unknown))
+            self.assertEqual(self.client.get(reverse("tournaments_detail", args=[unknown])).status_code, 404)
+
+        created = Tournament.objects.create(
+            id=unknown, name="New", start_date=datetime.date(2026, 6, 1),
+            end_date=datetime.date(2026, 6, 2), location="Kiel", division="open",
+        )
+        with override_settings(REFDATA_CHECK_INTERVAL=0):
+            self.assertEqual(refdata.store().tournament(unknown).name, created.name)
+
+    def test_squads_resolve_nation_and_tournament_from_the_store(self):
+        squads = refdata.attach_reference_data(list(Squad.objects.all()))
+        with self.assertNumQueries(0):
+            labels = [str(squad) for squad in squads]
+        self.assertEqual(labels, [str(squad) for squad in Squad.objects.select_related("tournament", "nation")])
+
+
+class DataVersionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(nations=2, seasons=2)
+
+    def test_bulk_deletes_bump_once(self):
+        nation = Nation.objects.order_by("id").first()
+        scope = DataVersion.nation_scope(nation.pk)
+        before = DataVersion.current(scope)
+        seats = SquadTeam.objects.filter(squad__nation=nation)
+        self.assertGreater(seats.count(), 10)
+        with CaptureQueriesContext(connection) as ctx, bulk_changes() as changed:
+            seats.delete()
+            changed.add(scope)
+        # collect, delete and one bump (an insert on first use), whatever the row count
+        self.assertLessEqual(len(ctx.captured_queries), 7)
+        self.assertEqual(DataVersion.current(scope), (before[0] + 1,))
+
+    def test_player_merge_bumps_the_nations_of_both_players(self):
+        seats = SquadTeam.objects.select_related("squad", "team").order_by("squad__nation_id", "id")
+        first, last = seats.first(), seats.last()
+        self.assertNotEqual(first.squad.nation_id, last.squad.nation_id)
+        scopes = [DataVersion.nation_scope(st.squad.nation_id) for st in (first, last)]
+        before = DataVersion.current(*scopes)
+        merge_players(first.team.playerA, last.team.playerA)
+        self.assertEqual(DataVersion.current(*scopes), tuple(v + 1 for v in before))
+
+    def test_single_changes_bump_through_signals(self):
+        squad_team = SquadTeam.objects.select_related("squad").first()
+        scope = DataVersion.nation_scope(squad_team.squad.nation_id)
+        before = DataVersion.current(scope)
+        squad_team.delete()
+        self.assertEqual(DataVersion.current(scope), (before[0] + 1,))
@@ -6,11 +6,13 @@ urlpatterns = [
     path('divisions/<str:division_slug>/', views.divisions_detail, name='divisions_detail'),
     path('nations/', views.nations, name='nations'),
     path('nations/<str:short>/', views.nations_detail, name='nations_detail'),
+    path('nations/<str:short>/scouting/', views.nations_scouting, name='nations_scouting'),
+    path('nations/<str:short>/scouting.json', views.nations_scouting_json, name='nations_scouting_json'),
+    path('tournaments/<int:id>/', views.tournaments_detail, name='tournaments_detail'),
     path('squads/<int:id>', views.squads_detail, name='squads_detail'),
     path('squads/match/', views.squad_match_view, name='squad-match'),
+    path('imports/roster/', views.roster_import_view, name='roster-import'),
     # path('', views.players, name='players'),
-    # teams filtered by tournament (and division)
     # players filtered by nationality
-    # squads filtert by tournament and division
     # matchups ?
 ]
\ No newline at end of file
@@ -1,20 +1,73 @@
+import io
+
+from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render
-from django.http import Http404
+from django.http import Http404, JsonResponse
 from django.db.models import Q, Prefetch, F
 from .models import Divisions, Nation, Tournament, Player, Squad, SquadTeam, Team
 from django.shortcuts import render, get_object_or_404
-from .forms import SquadMatchForm
+from .forms import RosterImportForm, SquadMatchForm
+from .roster_import import RosterImporter, RosterImportError, format_for, iter_rows
+from .pagination import keyset_paginate
+from .archive import ARCHIVE_DB, archive_available, database_for
+from .scouting import cached_scouting_report
+from .refdata import attach_reference_data, get_tournament_or_404
+
+# Page sizes for the keyset-paginated list pages; further pages are fetched
+# lazily by the "Load more" links (see index.html).
+NATIONS_PER_PAGE = 50
+TOURNAMENTS_PER_PAGE = 12
+DIVISION_TOURNAMENTS_PER_PAGE = 2
+
+
+def _int_param(request, name):
+    value = request.GET.get(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise Http404(f"Invalid {name}")
+
+
+def _next_page_url(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params.pop("partial", None)
+    params["after"] = cursor
+    return f"{request.path}?{params.urlencode()}"
+
+
+def _render_page(request, template_name, partial_name, context, next_url):
+    """
+    Full page on normal requests; only the rows on ``?partial=1`` so the
+    "Load more" link can append them, with the following page in a header.
+    """
+    if request.GET.get("partial") == "1":
+        response = render(request, partial_name, context)
+        if next_url:
+            response["X-Next-Page"] = next_url
+        return response
+    return render(request, template_name, {**context, "next_url": next_url})
+
 
 def nations(request):
-    nations = Nation.objects.order_by('name')
-    return render(request, 'knowledgedb/nations.html', {'nations': nations})
+    # keyset on (name, id) walks the Nation name index
+    nations, cursor = keyset_paginate(
+        Nation.objects.all(), ("name", "id"), request.GET.get("after"), NATIONS_PER_PAGE
+    )
+    return _render_page(
+        request, 'knowledgedb/nations.html', 'knowledgedb/partials/nation_rows.html',
+        {'nations': nations}, _next_page_url(request, cursor),
+    )
 
 def nations_detail(request, short):
-    nation = get_object_or_404(Nation, short=short)
+    db = database_for(request)
+    nation = get_object_or_404(Nation.objects.using(db), short=short)
     squads = (
-        Squad.objects
+        Squad.objects.using(db)
         .filter(nation=nation)
-        .select_related("tournament", "nation")
         .prefetch_related(
             Prefetch(
                 "squad_teams",
@@ -24,10 +77,11 @@ def nations_detail(request, short):
             )
         )
     )
+    squads = attach_reference_data(list(squads), db)
 
     # Base queryset of teams that actually appear in this nation's squads
     teams_in_nation_qs = (
-        Team.objects
+        Team.objects.using(db)
         .filter(squad_teams__squad__nation=nation)
         .select_related("playerA", "playerB")
         .distinct()
@@ -35,7 +89,7 @@ def nations_detail(request, short):
 
     # Players who appear in those teams (as you had), with prefetched teams
     players = (
-        Player.objects
+        Player.objects.using(db)
         .filter(
             Q(teams_as_playerA__squad_teams__squad__nation=nation) |
             Q(teams_as_playerB__squad_teams__squad__nation=nation)
@@ -48,10 +102,9 @@ def nations_detail(request, short):
         )
     )
 
-    eura_pro_count = players.filter(eura_pro=True).count()
-
     # Combine A/B teams into a single attribute per player (deduped, order preserved)
     players = list(players)  # evaluate so we can attach attributes
+    eura_pro_count = sum(p.eura_pro for p in players)
     for p in players:
         combined = []
         seen = set()
@@ -66,21 +119,85 @@ def nations_detail(request, short):
     return render(
         request,
         "knowledgedb/nations_detail.html",
-        {"nation": nation, "players": players, "squads": squads, "eura_pro_count": eura_pro_count},
+        {
+            "nation": nation, "players": players, "squads": squads, "eura_pro_count": eura_pro_count,
+            "archive": db == ARCHIVE_DB, "archive_available": archive_available(),
+        },
     )
 
+def nations_scouting(request, short):
+    db = database_for(request)
+    nation = get_object_or_404(Nation.objects.using(db), short=short)
+    return render(
+        request,
+        "knowledgedb/nations_scouting.html",
+        {"nation": nation, "report": cached_scouting_report(nation, db), "archive": db == ARCHIVE_DB},
+    )
+
+def nations_scouting_json(request, short):
+    db = database_for(request)
+    nation = get_object_or_404(Nation.objects.using(db), short=short)
+    return JsonResponse(cached_scouting_report(nation, db))
+
 def start(request):
-    tournaments = Tournament.objects.order_by("name")
-    return render(request, 'knowledgedb/start.html', {'tournaments': tournaments})
+    """
+    Most recent tournaments first, optionally narrowed by ?season=<year>
+    and ?division=<slug>; finished seasons with ?archive=1.
+    """
+    db = database_for(request)
+    tournaments = Tournament.objects.using(db)
+    season = _int_param(request, "season")
+    if season:
+        tournaments = tournaments.filter(start_date__year=season)
+    division = request.GET.get("division")
+    if division:
+        if division not in Divisions.values:
+            raise Http404("Unknown division")
+        tournaments = tournaments.filter(division=division)
+
+    # keyset on (start_date, id) walks the start_date index
+    tournaments, cursor = keyset_paginate(
+        tournaments, ("-start_date", "-id"), request.GET.get("after"), TOURNAMENTS_PER_PAGE
+    )
+    context = {
+        "tournaments": tournaments, "season": season, "division": division,
+        "archive": db == ARCHIVE_DB, "archive_available": archive_available(),
+    }
+    if request.GET.get("partial") != "1":
+        context["seasons"] = Tournament.objects.using(db).dates("start_date", "year", order="DESC")
+    return _render_page(
+        request, 'knowledgedb/start.html', 'knowledgedb/partials/tournament_cards.html',
+        context, _next_page_url(request, cursor),
+    )
 
 def divisions_detail(request, division_slug: str):
+    """
+    Squads of a division, a few tournaments per page (most recent first) so
+    the page does not grow with the archive. Narrow with ?season=<year> or
+    ?tournament=<id>; archived tournaments with ?archive=1.
+    """
     division = division_slug.lower()
     if division not in Divisions.values:
         raise Http404("Unknown division")
-    squads = (
-        Squad.objects
-        .filter(tournament__division=division)
-        .select_related("tournament", "nation")
+
+    db = database_for(request)
+    tournaments = Tournament.objects.using(db).filter(division=division)
+    season = _int_param(request, "season")
+    if season:
+        tournaments = tournaments.filter(start_date__year=season)
+    tournament_id = _int_param(request, "tournament")
+    if tournament_id:
+        tournaments = tournaments.filter(id=tournament_id)
+
+    # keyset on (start_date, id) within the division walks the
+    # (division, start_date) index
+    tournaments, cursor = keyset_paginate(
+        tournaments, ("-start_date", "-id"), request.GET.get("after"),
+        DIVISION_TOURNAMENTS_PER_PAGE,
+    )
+    squads = attach_reference_data(list(
+        Squad.objects.using(db)
+        .filter(tournament__in=tournaments)
         .prefetch_related(
             Prefetch(
                 "squad_teams",
@@ -89,24 +206,61 @@ def divisions_detail(request, division_slug: str):
                     .order_by("seed"),
             )
         )
-        .order_by("tournament__start_date", "nation__name")
-    )
-    return render(
+    ), db)
+    # in page order, nations by name; both come from the reference store
+    position = {t.id: i for i, t in enumerate(tournaments)}
+    squads.sort(key=lambda s: (position[s.tournament_id], s.nation.name))
+    return _render_page(
         request,
-        "knowledgedb/divisions_detail.html", {"division": division, "squads": squads},
+        "knowledgedb/divisions_detail.html", "knowledgedb/partials/division_rows.html",
+        {"division": division, "squads": squads, "season": season, "archive": db == ARCHIVE_DB},
+        _next_page_url(request, cursor),
+    )
+
+def tournaments_detail(request, id):
+    """
+    Seed sheet: every squad of the tournament as a column, seeds as rows.
+    The squads and all their seeds come from two flat queries, grouped by
+    squad here; tournament and nations come from the reference store. The
+    page costs the same two queries however many nations take part. A
+    squad without seeds yet still gets its (empty) column, a seed no squad
+    filled has no row, and a squad without a team at a seed gets an empty
+    cell.
+    """
+    db = database_for(request)
+    tournament = get_tournament_or_404(id, db)
+    squads = list(Squad.objects.using(db).filter(tournament_id=tournament.id).order_by("id"))
+    attach_reference_data(squads, db)
+    squads.sort(key=lambda squad: squad.nation.name)
+    columns = {squad.pk: {} for squad in squads}
+    seats = (
+        SquadTeam.objects.using(db)
+        .filter(squad__tournament_id=tournament.id)
+        .select_related("team__playerA", "team__playerB")
     )
+    for st in seats:
+        columns[st.squad_id][st.seed] = st
+    seeds = sorted({seed for column in columns.values() for seed in column})
+    return render(request, "knowledgedb/tournaments_detail.html", {
+        "tournament": tournament,
+        "squads": squads,
+        "rows": [(seed, [columns[squad.pk].get(seed) for squad in squads]) for seed in seeds],
+        "archive": db == ARCHIVE_DB,
+    })
 
 def squads_detail(request, id):
-    squad = get_object_or_404(Squad, id=id)
+    db = database_for(request)
+    squad = get_object_or_404(Squad.objects.using(db), id=id)
+    attach_reference_data([squad], db)
     teams = (
-        Team.objects
+        Team.objects.using(db)
         .filter(squad_teams__squad=squad)
         .annotate(seed=F("squad_teams__seed"))
         .select_related("playerA", "playerB")
         .prefetch_related("playerA__normal_teammate", "playerB__normal_teammate")
         .order_by("seed")
     )
-    return render(request, 'knowledgedb/squads_detail.html', {"squad": squad, "teams": teams})
+    return render(request, 'knowledgedb/squads_detail.html', {"squad": squad, "teams": teams, "archive": db == ARCHIVE_DB})
 
 
 def squad_match_view(request):
@@ -114,13 +268,14 @@ def squad_match_view(request):
     Pick two squads and see seed-vs-seed pairings.
     Also supports GET ?s1=<id>&s2=<id> for shareable links.
     """
-    initial = {}
+    data = request.POST or None
     s1 = request.GET.get("s1")
     s2 = request.GET.get("s2")
     if s1 and s2 and request.method == "GET":
-        initial = {"squad1": s1, "squad2": s2}
+        # a shared link shows the matchups right away
+        data = {"squad1": s1, "squad2": s2}
 
-    form = SquadMatchForm(request.POST or None, initial=initial)
+    form = SquadMatchForm(data)
 
     matchups = None
     squad1 = squad2 = None
@@ -129,18 +284,16 @@ def squad_match_view(request):
         squad1 = form.cleaned_data["squad1"]
         squad2 = form.cleaned_data["squad2"]
 
-        # Fetch entries ordered by seed, with teams + players
-        st1_qs = (SquadTeam.objects
-                  .filter(squad=squad1)
-                  .select_related("team", "team__playerA", "team__playerB")
-                  .order_by("seed"))
-        st2_qs = (SquadTeam.objects
-                  .filter(squad=squad2)
-                  .select_related("team", "team__playerA", "team__playerB")
-                  .order_by("seed"))
-
-        m1 = {st.seed: st for st in st1_qs}
-        m2 = {st.seed: st for st in st2_qs}
+        # Fetch entries of both squads at once, with teams + players
+        entries = (SquadTeam.objects
+                   .filter(squad__in=[squad1, squad2])
+                   .select_related("team", "team__playerA", "team__playerB")
+                   .prefetch_related("team__playerA__normal_teammate", "team__playerB__normal_teammate")
+                   .order_by("seed"))
+
+        m1, m2 = {}, {}
+        for st in entries:
+            (m1 if st.squad_id == squad1.id else m2)[st.seed] = st
         all_seeds = sorted(set(m1) | set(m2))
 
         # Build display rows: one per seed
@@ -154,4 +307,27 @@ def squad_match_view(request):
         request,
         "knowledgedb/squad_match.html",
         {"form": form, "matchups": matchups, "squad1": squad1, "squad2": squad2},
-    )
\ No newline at end of file
+    )
+
+
+@staff_member_required
+def roster_import_view(request):
+    """
+    Upload a federation roster file (see roster_import.py); dry run by
+    default so the diff can be checked before importing for real.
+    """
+    form = RosterImportForm(request.POST or None, request.FILES or None)
+    report = None
+    if form.is_valid():
+        upload = form.cleaned_data["file"]
+        tournament = form.cleaned_data["tournament"]
+        importer = RosterImporter(
+            tournament=tournament.pk if tournament else None,
+            dry_run=form.cleaned_data["dry_run"],
+        )
+        stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        try:
+            report = importer.run(iter_rows(stream, format_for(upload.name)))
+        except RosterImportError as exc:
+            form.add_error("file", str(exc))
+    return render(request, "knowledgedb/roster_import.html", {"form": form, "report": report})
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""
+Worker warm-up: do the one-off work of a fresh process before the first
+request instead of during it.
+
+- compile every template into the cached loader
+- import and populate the URL resolver
+- load the reference store (knowledgedb/refdata.py) and fill the
+  ContentType cache used by the admin
+- request ``settings.WARMUP_URLS`` in-process, which fills the layout
+  fragment cache and runs each view's code path once
+
+mate/wsgi.py runs ``warm_up()`` when the application is loaded, unless
+``MATE_WARMUP=0`` is set. A failing step is logged and skipped; warm-up
+never keeps a worker from starting.
+"""
+import io
+import logging
+import os
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.handlers.base import BaseHandler
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.template import engines
+from django.urls import get_resolver
+
+from . import refdata
+
+logger = logging.getLogger(__name__)
+
+
+def templates():
+    """Compile all templates found by the Django engine's loaders."""
+    engine = engines["django"].engine
+    count = 0
+    for loader in engine.template_loaders:
+        for directory in loader.get_dirs():
+            for root, _, files in os.walk(directory):
+                for filename in files:
+                    if filename.endswith((".html", ".txt")):
+                        engine.get_template(os.path.relpath(os.path.join(root, filename), directory))
+                        count += 1
+    return count
+
+
+def url_resolver():
+    resolver = get_resolver()
+    resolver.reverse_dict  # builds the reverse lookup tables
+    return len(resolver.url_patterns)
+
+
+def reference_data():
+    refs = refdata.store()
+    models = list(apps.get_app_config("knowledgedb").get_models())
+    return len(refs.nations) + len(refs.tournaments) + len(ContentType.objects.get_for_models(*models))
+
+
+def pages():
+    # the middleware stack and views, without django.test (which pulls in
+    # unittest) and without the request_started/finished signals, which
+    # would close the database connection after every request
+    handler = BaseHandler()
+    handler.load_middleware()
+    host = _host()
+    for path in settings.WARMUP_URLS:
+        request = WSGIRequest({
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": path,
+            "SERVER_NAME": host,
+            "SERVER_PORT": "80",
+            "HTTP_HOST": host,
+            "wsgi.input": io.BytesIO(),
+            "wsgi.url_scheme": "http",
+        })
+        response = handler.get_response(request)
+        if response.status_code != 200:
+            logger.warning("Warm-up request to %s returned %s", path, response.status_code)
+    return len(settings.WARMUP_URLS)
+
+
+def _host():
+    hosts = [h for h in settings.ALLOWED_HOSTS if h != "*" and not h.startswith(".")]
+    return hosts[0] if hosts else "localhost"
+
+
+STEPS = [templates, url_resolver, reference_data, pages]
+
+
+def warm_up():
+    """Run every step; returns ``[(step, count, ms)]``, count None for failed steps."""
+    timings = []
+    for step in STEPS:
+        start = time.perf_counter()
+        try:
+            count = step()
+        except Exception:
+            logger.exception("Warm-up step %s failed", step.__name__)
+            count = None
+        timings.append((step.__name__, count, (time.perf_counter() - start) * 1000))
+    # a pre-forking server must not hand this connection to its workers
+    connections.close_all()
+    return timings
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,22 +45,63 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'knowledgedb.middleware.HTMLCompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'knowledgedb.middleware.LazyLoadGuardMiddleware',
+]
+
+# Report relations that are fetched lazily while handling a request
+# (N+1 queries): "log", "raise" or None. See knowledgedb/lazyload.py.
+# Strict under `manage.py test`; on a development machine set e.g.
+# MATE_LAZYLOAD_GUARD=raise (an empty value switches it off).
+TESTING = sys.argv[1:2] == ['test']
+LAZYLOAD_GUARD = os.environ.get(
+    'MATE_LAZYLOAD_GUARD', 'raise' if TESTING else 'log' if DEBUG else ''
+) or None
+LAZYLOAD_GUARD_IGNORE = ['/admin/']
+
+# Dynamic responses (see knowledgedb/middleware.py): HTML is minified, then
+# compressed with Brotli (if installed) or gzip when at least this long.
+HTML_MINIFY = True
+COMPRESSION_MIN_LENGTH = 512
+
+# Seconds between checks whether nations or tournaments changed
+# (knowledgedb/refdata.py)
+REFDATA_CHECK_INTERVAL = 5
+
+# Requested in-process when a worker starts (knowledgedb/warmup.py)
+WARMUP_URLS = [
+    '/',
+    '/nations/',
+    '/divisions/open/',
+    '/divisions/women/',
+    '/divisions/coed/',
 ]
 
 ROOT_URLCONF = 'mate.urls'
 
+# Not a Django setting: the loaders below, wrapped in the cached loader
+# outside DEBUG (bench_templates uses them too)
+BASE_TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # compile each template once per process in production; re-read
+            # from disk on every render while developing
+            'loaders': BASE_TEMPLATE_LOADERS if DEBUG else [
+                ('django.template.loaders.cached.Loader', BASE_TEMPLATE_LOADERS),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -72,6 +115,27 @@ TEMPLATES = [
 WSGI_APPLICATION = 'mate.wsgi.application'
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Rendered layout chrome of index.html ({% cache %} fragments). Kept until
+    # the process restarts; DEPLOY_VERSION separates deploys on a shared cache.
+    'template_fragments': {
+        'BACKEND': (
+            'django.core.cache.backends.dummy.DummyCache' if DEBUG
+            else 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': 'template-fragments',
+        'KEY_PREFIX': os.environ.get('DEPLOY_VERSION', ''),
+        'TIMEOUT': None,
+    },
+}
+
+
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
@@ -79,9 +143,17 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # Finished tournaments moved out by `manage.py archive_tournaments`;
+    # read-only for the site, see knowledgedb/routers.py
+    'archive': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'archive.sqlite3',
+    },
 }
 
+DATABASE_ROUTERS = ['knowledgedb.routers.ArchiveRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
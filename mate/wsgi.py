@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mate.settings')
 
 application = get_wsgi_application()
+
+# Pay the first request's start-up costs now (see knowledgedb/warmup.py).
+if os.environ.get('MATE_WARMUP', '1') != '0':
+    from knowledgedb.warmup import warm_up
+
+    warm_up()